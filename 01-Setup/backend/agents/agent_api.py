@@ -1,17 +1,20 @@
 from fastapi import FastAPI, HTTPException, Depends, Request
-from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 from pydantic_models import (
     ConversionRequest, ConversionResponse,
     ComponentResult, ValidationResult, ValidationIssue, ValidationFix
 )
-from dspy_implementation import setup_dspy_pipeline
 
 import logging
+import threading
+import orjson
 import traceback
 import time
-import json
+import os
+from functools import lru_cache
 from typing import Dict, Any, List
 
 # ────────────────────────────────────────────────────────────────
@@ -20,7 +23,8 @@ from typing import Dict, Any, List
 app = FastAPI(
     title="AI Code Transformation Agent",
     description="A DSPy-powered agent for converting source code to target framework using planner/executor/validator/regrouper",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 app.add_middleware(
@@ -38,9 +42,18 @@ logger = logging.getLogger("agent-api")
 # ────────────────────────────────────────────────────────────────
 # DSPy Pipeline Setup
 # ────────────────────────────────────────────────────────────────
-pipeline = setup_dspy_pipeline()
+# Built (and groq imported) on the first request that needs it, so the server
+# starts listening and /health answers without waiting on it
+pipeline = None
+_pipeline_lock = threading.Lock()
 
 def get_pipeline():
+    global pipeline
+    if pipeline is None:
+        with _pipeline_lock:
+            if pipeline is None:
+                from dspy_implementation import setup_dspy_pipeline
+                pipeline = setup_dspy_pipeline()
     return pipeline
 
 # ────────────────────────────────────────────────────────────────
@@ -71,7 +84,8 @@ async def convert_code(
         start = time.time()
         logger.info("Starting conversion pipeline...")
 
-        result = pipeline(request.input_code)
+        # The pipeline blocks on Groq; run it off the event loop
+        result = await run_in_threadpool(pipeline, request.input_code)
 
         # Format results
         formatted_components = []
@@ -99,7 +113,8 @@ async def convert_code(
         duration = time.time() - start
         logger.info(f"✅ Conversion completed in {duration:.2f}s")
 
-        return ConversionResponse(
+        # Components were validated as they were built above
+        return ConversionResponse.model_construct(
             converted_code=result.converted_code,
             components=formatted_components,
             metadata={"duration_seconds": duration}
@@ -112,18 +127,31 @@ async def convert_code(
 # ────────────────────────────────────────────────────────────────
 # UI Mapping (optional preview/debug)
 # ────────────────────────────────────────────────────────────────
-@app.get("/ui-mapping", response_model=Dict[str, Any])
-async def get_ui_mapping():
-    try:
-        with open("ui_mapping.json", "r") as f:
-            return json.load(f)
-    except FileNotFoundError:
+UI_MAPPING_PATH = "ui_mapping.json"
+
+@lru_cache(maxsize=1)
+def _load_ui_mapping(mtime):
+    # Keyed on mtime so an edited file is picked up without a restart
+    if mtime is None:
         return {
             "color_map": {},
             "fonts": {},
             "alignment": {},
             "slider": {}
         }
+    with open(UI_MAPPING_PATH, "rb") as f:
+        return orjson.loads(f.read())
+
+def load_ui_mapping():
+    try:
+        mtime = os.path.getmtime(UI_MAPPING_PATH)
+    except FileNotFoundError:
+        mtime = None
+    return _load_ui_mapping(mtime)
+
+@app.get("/ui-mapping", response_model=Dict[str, Any])
+async def get_ui_mapping():
+    return load_ui_mapping()
 
 # ────────────────────────────────────────────────────────────────
 # Health Check
@@ -132,5 +160,7 @@ async def get_ui_mapping():
 async def health_check():
     return {
         "status": "healthy",
-        "pipeline": "initialized"
+        # Built on the first request that needs it, so absent until then or
+        # if building it failed
+        "pipeline": "initialized" if pipeline is not None else "not_initialized"
     }
@@ -1,11 +1,39 @@
 # agents/agentic_core.py
 # Step 1: Add Decision-Making Logic
 
-import json
+import atexit
+import logging
+import logging.handlers
+import orjson
+import queue
+import re
+import sys
 import time
-from typing import Dict, List, Any, Optional
+from contextvars import ContextVar
+from typing import Dict, List, Any, Optional, Tuple
 from enum import Enum
 from dataclasses import dataclass
+from collections import defaultdict
+from .conversion_cache import ConversionCache
+from .llm_utils import stream_clean, strip_fence
+
+logger = logging.getLogger(__name__)
+_log_listener = None
+
+# Start of a top-level describe()/context()/it() block, including .only/.skip
+_TEST_BLOCK_RE = re.compile(r"(?<![\w$.])(?:describe|context|it)(?:\.only|\.skip)?\s*\(")
+
+# Every fallback heuristic in one pass; group n counts matches for feature n.
+# "cy" uses a lookahead so the "." stays available for ".type(" / ".select(".
+_FALLBACK_RE = re.compile(r"(cy)(?=\.)|((?i:custom))|(intercept|request)|(\.type\(|\.select\()|(it\()")
+_CY, _CUSTOM, _API, _FORM, _IT = range(1, 6)
+
+# First JSON object in a response, allowing one level of nested braces
+_JSON_OBJ_RE = re.compile(r"\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}", re.DOTALL)
+
+# Callback for streamed output of the current conversion; a context variable
+# so concurrent requests on a shared converter don't see each other's callback
+_stream_callback: ContextVar = ContextVar("stream_callback", default=None)
 
 class ConversionStrategy(Enum):
     SIMPLE = "simple"
@@ -20,7 +48,7 @@ class AgentDecision(Enum):
     ESCALATE = "escalate"
     SWITCH_STRATEGY = "switch_strategy"
 
-@dataclass
+@dataclass(slots=True)
 class ConversionContext:
     code_complexity: int
     has_custom_commands: bool
@@ -29,6 +57,32 @@ class ConversionContext:
     test_count: int
     previous_attempts: List[str]
     success_rate: float = 0.0
+    strategy: Optional[ConversionStrategy] = None  # Set once decided, reused when executing
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Analysis fields as a plain dict (slotted instances have no __dict__)"""
+        return {name: getattr(self, name) for name in self.__slots__ if name != "strategy"}
+
+# Strategy conditions in their original priority order; the first one that
+# holds decides. Each is evaluated once per decision, see _strategy_flags.
+def _strategy_flags(c) -> tuple:
+    return (
+        c.has_custom_commands,
+        c.has_api_calls and c.code_complexity > 7,
+        c.has_form_interactions and c.test_count > 3,
+        c.code_complexity > 6,
+    )
+
+# A rule matches when the flags start with its prefix: every higher-priority
+# condition false and its own true (SIMPLE: all false). Exactly one matches, so
+# the list can be reordered by how often each strategy is chosen.
+_STRATEGY_RULES = [
+    (ConversionStrategy.CUSTOM_COMMANDS, (True,)),
+    (ConversionStrategy.API_TESTING, (False, True)),
+    (ConversionStrategy.FORM_HEAVY, (False, False, True)),
+    (ConversionStrategy.COMPLEX, (False, False, False, True)),
+    (ConversionStrategy.SIMPLE, (False, False, False, False)),
+]
 
 @dataclass
 class ConversionResult:
@@ -41,15 +95,90 @@ class ConversionResult:
 
 class AgenticConverter:
     """Step 1: Agentic converter with decision-making capabilities"""
+
+    _JSON_MODE = {"type": "json_object"}
+    ANALYSIS_MAX_TOKENS = 300
+
+    _ANALYSIS_PROMPT = """Analyze the Cypress code and determine its characteristics.
+
+Return JSON with:
+{
+    "complexity_score": 1-10,
+    "has_custom_commands": true/false,
+    "has_api_calls": true/false,
+    "has_form_interactions": true/false,
+    "test_count": number,
+    "dominant_patterns": ["pattern1", "pattern2"],
+    "risk_factors": ["risk1", "risk2"]
+}"""
+
+    # Strategy instructions, sent as a constant system message so only the code
+    # varies between requests and the provider can reuse the cached prefix
+    _PROMPT_PREFIX = {
+        ConversionStrategy.SIMPLE: """Convert simple Cypress code to Playwright.
+
+Use basic conversions:
+- cy.get() → page.locator()
+- cy.type() → page.fill()
+- cy.click() → page.click()
+- Add async/await and proper imports""",
+
+        ConversionStrategy.COMPLEX: """Convert complex Cypress code to Playwright with careful attention.
+
+Focus on:
+- Nested test structures
+- Complex selectors
+- Multiple assertions
+- Proper async/await patterns
+- Error handling""",
+
+        ConversionStrategy.CUSTOM_COMMANDS: """Convert Cypress code with custom commands to Playwright.
+
+Special handling for:
+- Custom cy.* commands → create helper functions
+- Maintain command reusability
+- Document helper functions
+- Preserve custom logic""",
+
+        ConversionStrategy.FORM_HEAVY: """Convert form-heavy Cypress code to Playwright.
+
+Optimize for:
+- Form field interactions
+- Input validation
+- Form submission
+- Error state handling
+- Accessibility selectors""",
+
+        ConversionStrategy.API_TESTING: """Convert API-testing Cypress code to Playwright.
+
+Handle:
+- cy.intercept() → page.route()
+- API mocking and responses
+- Network conditions
+- Response validation
+- Async API calls""",
+    }
     
     def __init__(self, llm):
         self.llm = llm
-        self.memory = {}  # Store learning from past conversions
-        print("✅ AgenticConverter initialized with decision-making")
+        self.memory = defaultdict(self._new_memory_entry)  # Store learning from past conversions
+        self.total_attempts = 0  # Running totals so stats don't rescan memory
+        self.total_successes = 0
+        self.cache = ConversionCache()  # Skip the LLM for repeated inputs
+        self.strategy_rules = list(_STRATEGY_RULES)  # Most frequently chosen first
+        self.strategy_hits = {strategy: 0 for strategy, _ in _STRATEGY_RULES}
+        logger.info("✅ AgenticConverter initialized with decision-making")
     
-    def __call__(self, input_code: str):
-        """Make the converter callable like SimpleConverter"""
-        result = self.convert(input_code)
+    def __call__(self, input_code: str, on_chunk=None):
+        """Make the converter callable like SimpleConverter.
+
+        If on_chunk is given, converted code is passed to it as it streams in.
+        """
+        token = _stream_callback.set(on_chunk)
+        try:
+            result = self.convert(input_code)
+        finally:
+            _stream_callback.reset(token)
         
         # Return in the same format as SimpleConverter for compatibility
         return {
@@ -74,18 +203,19 @@ class AgenticConverter:
         
     def convert(self, input_code: str) -> ConversionResult:
         """Main agentic conversion process"""
-        print("🤖 Starting agentic conversion with decision-making...")
+        logger.info("🤖 Starting agentic conversion with decision-making...")
         
         # STEP 1: ANALYZE AND DECIDE
         context = self._analyze_code(input_code)
         strategy = self._decide_strategy(context)
+        context.strategy = strategy
         
-        print(f"🧠 Decided on strategy: {strategy.value}")
-        print(f"📊 Code complexity: {context.code_complexity}/10")
+        logger.debug("🧠 Decided on strategy: %s", strategy.value)
+        logger.debug("📊 Code complexity: %s/10", context.code_complexity)
         
         # STEP 2: PLAN CONVERSION
         plan = self._create_conversion_plan(context, strategy)
-        print(f"📋 Created plan with {len(plan)} steps")
+        logger.debug("📋 Created plan with %d steps", len(plan))
         
         # STEP 3: EXECUTE WITH ADAPTATION
         result = self._execute_plan(input_code, plan, context)
@@ -98,62 +228,51 @@ class AgenticConverter:
     def _analyze_code(self, code: str) -> ConversionContext:
         """Agent decides what type of code it's dealing with"""
         
-        analysis_prompt = f"""
-        Analyze this Cypress code and determine its characteristics:
-        
-        ```javascript
-        {code}
-        ```
-        
-        Return JSON with:
-        {{
-            "complexity_score": 1-10,
-            "has_custom_commands": true/false,
-            "has_api_calls": true/false, 
-            "has_form_interactions": true/false,
-            "test_count": number,
-            "dominant_patterns": ["pattern1", "pattern2"],
-            "risk_factors": ["risk1", "risk2"]
-        }}
-        """
-        
-        response = self.llm(analysis_prompt)
-        
-        try:
-            analysis = json.loads(response)
-            return ConversionContext(
-                code_complexity=analysis.get("complexity_score", 5),
-                has_custom_commands=analysis.get("has_custom_commands", False),
-                has_api_calls=analysis.get("has_api_calls", False),
-                has_form_interactions=analysis.get("has_form_interactions", False),
-                test_count=analysis.get("test_count", 1),
-                previous_attempts=[]
-            )
-        except json.JSONDecodeError:
-            # Fallback to simple heuristics if LLM response is malformed
-            return ConversionContext(
-                code_complexity=len(code.split('\n')) // 10,
-                has_custom_commands='cy.' in code and 'custom' in code.lower(),
-                has_api_calls='intercept' in code or 'request' in code,
-                has_form_interactions='.type(' in code or '.select(' in code,
-                test_count=code.count('it('),
-                previous_attempts=[]
-            )
+        # JSON mode keeps the reply to the object itself, so it needs few tokens
+        response = self.llm(code, system=self._ANALYSIS_PROMPT,
+                            response_format=self._JSON_MODE, max_tokens=self.ANALYSIS_MAX_TOKENS)
+        
+        # The JSON is often wrapped in prose or a code fence, so find it first
+        # rather than letting the parser fail on the whole response
+        match = _JSON_OBJ_RE.search(response)
+        if match:
+            try:
+                analysis = orjson.loads(match.group(0))
+            except orjson.JSONDecodeError:
+                analysis = None
+            if isinstance(analysis, dict):
+                return ConversionContext(
+                    code_complexity=analysis.get("complexity_score", 5),
+                    has_custom_commands=analysis.get("has_custom_commands", False),
+                    has_api_calls=analysis.get("has_api_calls", False),
+                    has_form_interactions=analysis.get("has_form_interactions", False),
+                    test_count=analysis.get("test_count", 1),
+                    previous_attempts=[]
+                )
+
+        # Fallback to simple heuristics if LLM response is malformed
+        logger.debug("Malformed analysis response, using heuristics: %.200r", response)
+        counts = [0] * 6
+        for token in _FALLBACK_RE.finditer(code):
+            counts[token.lastindex] += 1
+        return ConversionContext(
+            code_complexity=(code.count('\n') + 1) // 10,
+            has_custom_commands=bool(counts[_CY] and counts[_CUSTOM]),
+            has_api_calls=bool(counts[_API]),
+            has_form_interactions=bool(counts[_FORM]),
+            test_count=counts[_IT],
+            previous_attempts=[]
+        )
     
     def _decide_strategy(self, context: ConversionContext) -> ConversionStrategy:
         """Agent chooses the best strategy based on analysis"""
         
-        # Decision tree based on code characteristics
-        if context.has_custom_commands:
-            return ConversionStrategy.CUSTOM_COMMANDS
-        elif context.has_api_calls and context.code_complexity > 7:
-            return ConversionStrategy.API_TESTING
-        elif context.has_form_interactions and context.test_count > 3:
-            return ConversionStrategy.FORM_HEAVY
-        elif context.code_complexity > 6:
-            return ConversionStrategy.COMPLEX
-        else:
-            return ConversionStrategy.SIMPLE
+        # Rules are mutually exclusive, checked most frequent first
+        flags = tuple(map(bool, _strategy_flags(context)))
+        for strategy, prefix in self.strategy_rules:
+            if flags[:len(prefix)] == prefix:
+                return strategy
+        return ConversionStrategy.SIMPLE
     
     def _create_conversion_plan(self, context: ConversionContext, strategy: ConversionStrategy) -> List[Dict]:
         """Agent creates a multi-step plan"""
@@ -183,27 +302,81 @@ class AgenticConverter:
     def _execute_plan(self, code: str, plan: List[Dict], context: ConversionContext) -> ConversionResult:
         """Agent executes plan with adaptation"""
         
-        # For now, use enhanced prompt based on strategy
-        strategy_prompts = {
-            ConversionStrategy.SIMPLE: self._get_simple_prompt(code),
-            ConversionStrategy.COMPLEX: self._get_complex_prompt(code),
-            ConversionStrategy.CUSTOM_COMMANDS: self._get_custom_commands_prompt(code),
-            ConversionStrategy.FORM_HEAVY: self._get_form_heavy_prompt(code),
-            ConversionStrategy.API_TESTING: self._get_api_testing_prompt(code)
-        }
-        
-        strategy = self._decide_strategy(context)
-        prompt = strategy_prompts.get(strategy, strategy_prompts[ConversionStrategy.SIMPLE])
+        # Each strategy has its own specialised executor, generated below the class
+        strategy = context.strategy or self._decide_strategy(context)
+        return getattr(self, f"_execute_{strategy.value}")(code, plan, context)
+
+    def _run_strategy(self, code: str, plan: List[Dict], context: ConversionContext,
+                      strategy: ConversionStrategy, system_prompt: str) -> ConversionResult:
+        """Convert with the given strategy's instructions as the system message"""
+        on_chunk = _stream_callback.get()
+        cached_code = self.cache.lookup(code, scope=strategy.value)
+        if cached_code is not None:
+            logger.info("⚡ Returning cached conversion")
+            if on_chunk is not None:
+                on_chunk(cached_code)
+            return ConversionResult(
+                success=True,
+                code=cached_code,
+                confidence=0.85,
+                strategy_used=strategy,
+                issues=[],
+                metadata={"plan_steps": len(plan), "agentic": True, "cache_hit": True}
+            )
         
         try:
-            converted_code = self.llm(prompt)
-            print("✅ Code converted successfully with strategy-specific approach")
-            
-            # Clean up response
-            if "```javascript" in converted_code:
-                converted_code = converted_code.split("```javascript")[1].split("```")[0].strip()
-            elif "```" in converted_code:
-                converted_code = converted_code.split("```")[1].split("```")[0].strip()
+            # Independent test blocks are converted concurrently
+            blocks = self._split_tests(code) if context.test_count > 1 else [code]
+            if len(blocks) > 1 and hasattr(self.llm, "gather"):
+                # Blocks repeat across spec files; look them all up in one batch
+                # and only send the misses to the LLM. Only exact hits are reused;
+                # a near-duplicate block is attached to its miss as an example
+                parts = self.cache.lookup_many(blocks, scope=strategy.value)
+                missing = [i for i, part in enumerate(parts) if part is None]
+                # Identical blocks within one input are sent once and fanned back out
+                distinct = list(dict.fromkeys(blocks[i] for i in missing))
+                examples = self.cache.similar_many(distinct, scope=strategy.value)
+                messages = [self._with_example(block, example) for block, example in zip(distinct, examples)]
+                responses = self.llm.gather(messages, system=system_prompt) if distinct else []
+                logger.info("⚡ Converted %d test blocks concurrently (%d cached, %d duplicates)",
+                            len(distinct), len(blocks) - len(missing), len(missing) - len(distinct))
+                error_prefix = getattr(self.llm, "ERROR_PREFIX", None)
+                converted = {}
+                fresh_blocks, fresh_parts = [], []
+                for block, response in zip(distinct, responses):
+                    converted[block] = self._clean_response(response)
+                    if not (error_prefix and response.startswith(error_prefix)):
+                        fresh_blocks.append(block)
+                        fresh_parts.append(converted[block])
+                for i in missing:
+                    parts[i] = converted[blocks[i]]
+                if fresh_blocks:
+                    self.cache.update_many(fresh_blocks, fresh_parts, scope=strategy.value)
+                converted_code = self._merge_converted(parts)
+                if on_chunk is not None:
+                    on_chunk(converted_code)
+            elif on_chunk is not None and hasattr(self.llm, "stream"):
+                blocks = [code]
+                message = self._with_example(code, self.cache.similar(code, scope=strategy.value))
+                # A stream that fails part-way raises into the except below, so
+                # its partial output is reported as a failure and never cached
+                raw_response, converted_code = stream_clean(
+                    self.llm.stream(message, system=system_prompt), on_chunk
+                )
+                responses = [raw_response]
+            else:
+                blocks = [code]
+                message = self._with_example(code, self.cache.similar(code, scope=strategy.value))
+                responses = [self.llm(message, system=system_prompt)]
+                converted_code = self._clean_response(responses[0])
+                if on_chunk is not None:
+                    on_chunk(converted_code)
+            logger.info("✅ Code converted successfully with strategy-specific approach")
+            error_prefix = getattr(self.llm, "ERROR_PREFIX", None)
+            cacheable = not (error_prefix and any(r.startswith(error_prefix) for r in responses))
+
+            if cacheable:
+                self.cache.update(code, converted_code, scope=strategy.value)
             
             return ConversionResult(
                 success=True,
@@ -211,7 +384,7 @@ class AgenticConverter:
                 confidence=0.85,  # Higher confidence with agentic approach
                 strategy_used=strategy,
                 issues=[],
-                metadata={"plan_steps": len(plan), "agentic": True}
+                metadata={"plan_steps": len(plan), "agentic": True, "test_blocks": len(blocks)}
             )
             
         except Exception as e:
@@ -223,93 +396,134 @@ class AgenticConverter:
                 issues=[str(e)],
                 metadata={"error": str(e)}
             )
-    
-    def _get_simple_prompt(self, code: str) -> str:
-        return f"""
-        Convert this simple Cypress code to Playwright:
-        
-        {code}
-        
-        Use basic conversions:
-        - cy.get() → page.locator()
-        - cy.type() → page.fill()
-        - cy.click() → page.click()
-        - Add async/await and proper imports
-        """
-    
-    def _get_complex_prompt(self, code: str) -> str:
-        return f"""
-        Convert this complex Cypress code to Playwright with careful attention to:
-        
-        {code}
-        
-        Focus on:
-        - Nested test structures
-        - Complex selectors
-        - Multiple assertions
-        - Proper async/await patterns
-        - Error handling
-        """
-    
-    def _get_custom_commands_prompt(self, code: str) -> str:
-        return f"""
-        Convert this Cypress code with custom commands to Playwright:
-        
-        {code}
-        
-        Special handling for:
-        - Custom cy.* commands → create helper functions
-        - Maintain command reusability
-        - Document helper functions
-        - Preserve custom logic
-        """
-    
-    def _get_form_heavy_prompt(self, code: str) -> str:
-        return f"""
-        Convert this form-heavy Cypress code to Playwright:
-        
-        {code}
-        
-        Optimize for:
-        - Form field interactions
-        - Input validation
-        - Form submission
-        - Error state handling
-        - Accessibility selectors
-        """
-    
-    def _get_api_testing_prompt(self, code: str) -> str:
-        return f"""
-        Convert this API-testing Cypress code to Playwright:
-        
-        {code}
-        
-        Handle:
-        - cy.intercept() → page.route()
-        - API mocking and responses
-        - Network conditions
-        - Response validation
-        - Async API calls
+
+    @staticmethod
+    def _with_example(code: str, example: Optional[Tuple[str, str]]) -> str:
+        """Put a similar, already converted snippet ahead of the code as a guide"""
+        if example is None:
+            return code
+        source, converted = example
+        return (
+            "A similar snippet and its conversion, for reference only. Selectors, "
+            "URLs and values must come from the code to convert, not from this example.\n"
+            f"```javascript\n{source}\n```\n```typescript\n{converted}\n```\n\n"
+            f"Code to convert:\n{code}"
+        )
+
+    @staticmethod
+    def _clean_response(converted_code: str) -> str:
+        """Strip markdown code fences from an LLM response"""
+        return strip_fence(converted_code)
+
+    @staticmethod
+    def _split_tests(code: str) -> List[str]:
+        """Split code into shared setup plus each top-level describe/it block.
+
+        Returns [code] unchanged when there are fewer than two top-level blocks.
+        Strings and comments are skipped while matching brackets.
         """
+        blocks = []
+        depth = 0
+        block_start = None
+        i, n = 0, len(code)
+
+        while i < n:
+            ch = code[i]
+            if ch in "'\"`":
+                # Skip string literal, honouring escapes
+                i += 1
+                while i < n and code[i] != ch:
+                    i += 2 if code[i] == "\\" else 1
+                i += 1
+                continue
+            if code.startswith("//", i):
+                i = code.find("\n", i)
+                if i < 0:
+                    break
+                continue
+            if code.startswith("/*", i):
+                end = code.find("*/", i + 2)
+                i = n if end < 0 else end + 2
+                continue
+
+            if depth == 0 and block_start is None:
+                match = _TEST_BLOCK_RE.match(code, i)
+                if match:
+                    block_start = i
+                    depth = 1
+                    i = match.end()
+                    continue
+
+            if ch in "([{":
+                depth += 1
+            elif ch in ")]}":
+                depth -= 1
+                if depth == 0 and block_start is not None:
+                    end = i + 1
+                    if code.startswith(";", end):
+                        end += 1
+                    blocks.append((block_start, end))
+                    block_start = None
+            i += 1
+
+        if len(blocks) < 2 or block_start is not None:
+            return [code]
+
+        # Everything outside the blocks (imports, helpers, top-level hooks)
+        setup, last = [], 0
+        for start, end in blocks:
+            setup.append(code[last:start])
+            last = end
+        setup.append(code[last:])
+        shared = "".join(setup).strip()
+
+        parts = [code[start:end] for start, end in blocks]
+        return [shared] + parts if shared else parts
+
+    @staticmethod
+    def _merge_converted(parts: List[str]) -> str:
+        """Join separately converted blocks, hoisting and de-duplicating imports"""
+        if len(parts) == 1:
+            return parts[0]
+
+        imports, bodies = [], []
+        for part in parts:
+            body = []
+            for line in part.splitlines():
+                if line.startswith("import "):
+                    if line not in imports:
+                        imports.append(line)
+                else:
+                    body.append(line)
+            body = "\n".join(body).strip()
+            if body:
+                bodies.append(body)
+
+        header = "\n".join(imports)
+        return "\n\n".join([header] + bodies if header else bodies)
     
     def _update_memory(self, context: ConversionContext, strategy: ConversionStrategy, result: ConversionResult):
         """Agent learns from each conversion"""
         
-        memory_key = f"{strategy.value}_{context.code_complexity}_{context.test_count}"
-        
-        if memory_key not in self.memory:
-            self.memory[memory_key] = {
-                "attempts": 0,
-                "successes": 0,
-                "avg_confidence": 0.0,
-                "common_issues": []
-            }
+        # Keep the decision rules ordered by how often each strategy wins. Only
+        # re-rank when this hit moves the strategy past its neighbour, and swap
+        # in a new list: _decide_strategy may be iterating the old one
+        hits = self.strategy_hits
+        hits[strategy] = hits.get(strategy, 0) + 1
+        rules = self.strategy_rules
+        position = next(i for i, (s, _) in enumerate(rules) if s is strategy)
+        if position and hits.get(rules[position - 1][0], 0) < hits[strategy]:
+            self.strategy_rules = sorted(rules, key=lambda rule: -hits.get(rule[0], 0))
+
+        memory_key = (strategy, context.code_complexity, context.test_count)
         
         memory = self.memory[memory_key]
         memory["attempts"] += 1
+        self.total_attempts += 1
         
         if result.success:
             memory["successes"] += 1
+            self.total_successes += 1
         
         # Update average confidence
         memory["avg_confidence"] = (
@@ -318,39 +532,80 @@ class AgenticConverter:
         )
         
         # Track common issues
-        for issue in result.issues:
-            if issue not in memory["common_issues"]:
-                memory["common_issues"].append(issue)
+        memory["common_issues"].update(result.issues)
         
-        print(f"📚 Updated memory: {memory['successes']}/{memory['attempts']} success rate")
+        logger.debug("📚 Updated memory: %d/%d success rate", memory["successes"], memory["attempts"])
     
+    @staticmethod
+    def _new_memory_entry() -> Dict:
+        return {
+            "attempts": 0,
+            "successes": 0,
+            "avg_confidence": 0.0,
+            "common_issues": set()
+        }
+
     def get_performance_stats(self) -> Dict:
         """Agent reports its learning and performance"""
         
-        total_attempts = sum(mem["attempts"] for mem in self.memory.values())
-        total_successes = sum(mem["successes"] for mem in self.memory.values())
-        
         return {
-            "total_conversions": total_attempts,
-            "success_rate": total_successes / total_attempts if total_attempts > 0 else 0,
+            "total_conversions": self.total_attempts,
+            "success_rate": self.total_successes / self.total_attempts if self.total_attempts > 0 else 0,
             "strategies_learned": len(self.memory),
-            "memory_entries": list(self.memory.keys())
+            "memory_entries": [f"{s.value}_{c}_{t}" for s, c, t in self.memory],
+            "cache": self.cache.stats(),
+            "llm_cache": self.llm.cache_stats() if hasattr(self.llm, "cache_stats") else None
         }
 
+def _make_strategy_executor(strategy: ConversionStrategy):
+    """Build an _execute_<strategy> method with its system prompt bound in"""
+    system_prompt = AgenticConverter._PROMPT_PREFIX[strategy]
+
+    def execute(self, code: str, plan: List[Dict], context: ConversionContext) -> ConversionResult:
+        return self._run_strategy(code, plan, context, strategy, system_prompt)
+
+    execute.__name__ = execute.__qualname__ = f"_execute_{strategy.value}"
+    execute.__doc__ = f"Execute the plan with the {strategy.value} strategy"
+    return execute
+
+for _strategy in ConversionStrategy:
+    setattr(AgenticConverter, f"_execute_{_strategy.value}", _make_strategy_executor(_strategy))
+
+def configure_logging(level=logging.INFO):
+    """Send agents.* logs through a queue so callers never block on the write.
+
+    A QueueListener thread does the actual stdout writes. Safe to call more
+    than once; only the first call installs the handlers.
+    """
+    global _log_listener
+    if _log_listener is not None:
+        return
+
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    log_queue = queue.SimpleQueue()
+    _log_listener = logging.handlers.QueueListener(log_queue, handler)
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
+
+    package_logger = logging.getLogger(__name__.rpartition(".")[0] or __name__)
+    package_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    package_logger.setLevel(level)
+    package_logger.propagate = False
+
 def setup_agentic_pipeline():
     """Initialize the agentic pipeline (Step 1)"""
     try:
-        from dotenv import load_dotenv
-        load_dotenv()
+        configure_logging()
         
-        from .dspy_implementation import GroqLLM
-        llm = GroqLLM()
+        from .dspy_implementation import get_llm
+        llm = get_llm()
         
         converter = AgenticConverter(llm)
-        print("🤖 Agentic converter initialized (Step 1: Decision-making)")
+        logger.info("🤖 Agentic converter initialized (Step 1: Decision-making)")
         
         return converter
         
     except Exception as e:
-        print(f"❌ Error setting up agentic pipeline: {e}")
+        logger.error("❌ Error setting up agentic pipeline: %s", e)
         raise e
\ No newline at end of file
@@ -0,0 +1,276 @@
+# agents/conversion_cache.py
+# Response cache so repeated Cypress snippets skip the LLM, and near-duplicates
+# get a worked example to convert from
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+
+class ConversionCache:
+    """Two-level cache: L1 exact sha256 match, L2 semantic match on embeddings
+
+    Only L1 hits are returned as conversions. Two snippets can embed almost
+    identically yet differ in a selector, URL or expected text, so an L2 match
+    is only offered through similar() as an example for the prompt.
+    """
+
+    EMB_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+    QUANTIZE = True  # int8 Linear layers: faster CPU encode, near-identical similarities
+
+    def __init__(self, max_entries: int = 10000, similarity_threshold: float = 0.92,
+                 semantic: bool = True):
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.semantic = semantic
+        # Guards both levels and the counters; one cache is shared by the
+        # converter across request threads and transform workers
+        self._lock = threading.Lock()
+        self._model_lock = threading.Lock()
+
+        # L1: exact hash -> converted code, least recently used evicted first
+        self._exact: "OrderedDict[str, str]" = OrderedDict()
+
+        # L2: one contiguous matrix of normalized embeddings, used as a ring buffer
+        self._model = None
+        self._vectors = None
+        self._scopes: List[int] = []
+        self._inputs: List[str] = []
+        self._values: List[str] = []
+        self._scope_ids: Dict[str, int] = {}
+        self._next_slot = 0
+
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(code: str, scope: str) -> str:
+        return hashlib.sha256(f"{scope}\0{code}".encode()).hexdigest()
+
+    def lookup(self, code: str, scope: str = "") -> Optional[str]:
+        """Return cached converted code for this exact input, or None on a miss"""
+        return self.lookup_many([code], scope)[0]
+
+    def lookup_many(self, codes: List[str], scope: str = "") -> List[Optional[str]]:
+        """Look up several inputs at once, exact matches only"""
+        results: List[Optional[str]] = [None] * len(codes)
+        with self._lock:
+            for index, code in enumerate(codes):
+                key = self._key(code, scope)
+                cached = self._exact.get(key)
+                if cached is not None:
+                    self._exact.move_to_end(key)
+                    self.hits += 1
+                    results[index] = cached
+                else:
+                    self.misses += 1
+        return results
+
+    def similar(self, code: str, scope: str = "") -> Optional[Tuple[str, str]]:
+        """Return the closest cached (input, converted code) pair, or None"""
+        return self.similar_many([code], scope)[0]
+
+    def similar_many(self, codes: List[str], scope: str = "") -> List[Optional[Tuple[str, str]]]:
+        """Nearest cached pair per input above the threshold, embedded in one batch"""
+        if not (codes and self.semantic and self._values):
+            return [None] * len(codes)
+        matches = self._semantic_lookup(codes, scope)
+        with self._lock:
+            self.semantic_hits += sum(match is not None for match in matches)
+        return matches
+
+    def update(self, code: str, result: str, scope: str = ""):
+        """Store the converted code for this input"""
+        self.update_many([code], [result], scope)
+
+    def update_many(self, codes: List[str], results: List[str], scope: str = ""):
+        """Store several conversions; new inputs are embedded in one batch"""
+        new_codes, new_results = [], []
+        with self._lock:
+            for code, result in zip(codes, results):
+                key = self._key(code, scope)
+                if key not in self._exact:
+                    new_codes.append(code)
+                    new_results.append(result)
+                self._exact[key] = result
+                self._exact.move_to_end(key)
+                if len(self._exact) > self.max_entries:
+                    self._exact.popitem(last=False)
+
+        if self.semantic and new_codes:
+            self._semantic_add(new_codes, new_results, scope)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            entries = len(self._exact)
+            hits, semantic_hits, misses = self.hits, self.semantic_hits, self.misses
+        lookups = hits + misses
+        return {
+            "entries": entries,
+            "hits": hits,
+            "semantic_hits": semantic_hits,  # Misses that got an example
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0
+        }
+
+    def _encode(self, codes: List[str]):
+        """Embed codes with the sentence-transformer, loading it on first use"""
+        if self._model is None:
+            # Loaded once even when several threads miss at the same time
+            with self._model_lock:
+                if self._model is None and self.semantic:
+                    try:
+                        import numpy
+                        from sentence_transformers import SentenceTransformer
+                        model = SentenceTransformer(self.EMB_MODEL, device="cpu")
+                    except Exception as e:
+                        print(f"⚠️ Semantic cache disabled: {e}")
+                        self.semantic = False
+                        return None
+                    self._model = self._quantize(model) if self.QUANTIZE else model
+            if self._model is None:
+                return None
+        return self._model.encode(codes, batch_size=64, normalize_embeddings=True, convert_to_numpy=True)
+
+    @staticmethod
+    def _quantize(model):
+        """int8 dynamic quantization of the Linear layers; falls back to fp32"""
+        try:
+            import torch
+            return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        except Exception as e:
+            print(f"⚠️ Embedding model left unquantized: {e}")
+            return model
+
+    def _semantic_lookup(self, codes: List[str], scope: str) -> List[Optional[Tuple[str, str]]]:
+        if scope not in self._scope_ids:
+            return [None] * len(codes)
+
+        # Encoding runs outside the lock; only the scan holds it
+        queries = self._encode(codes)
+        if queries is None:
+            return [None] * len(codes)
+
+        import numpy as np
+
+        with self._lock:
+            scope_id = self._scope_ids[scope]
+            count = len(self._values)
+            # Embeddings are unit length, so the dot product is the cosine similarity
+            sims = self._vectors[:count] @ queries.T
+            sims[np.asarray(self._scopes) != scope_id] = -1.0
+            best = sims.argmax(axis=0)
+            return [
+                (self._inputs[row], self._values[row])
+                if sims[row, column] >= self.similarity_threshold else None
+                for column, row in enumerate(best.tolist())
+            ]
+
+    def _semantic_add(self, codes: List[str], results: List[str], scope: str):
+        vectors = self._encode(codes)
+        if vectors is None:
+            return
+
+        with self._lock:
+            self._semantic_store(vectors, codes, results, scope)
+
+    def _semantic_store(self, vectors, codes: List[str], results: List[str], scope: str):
+        import numpy as np
+
+        scope_id = self._scope_ids.setdefault(scope, len(self._scope_ids))
+
+        for vector, code, result in zip(vectors, codes, results):
+            count = len(self._values)
+            if count < self.max_entries:
+                if self._vectors is None or count == len(self._vectors):
+                    capacity = min(self.max_entries, max(64, count * 2))
+                    grown = np.zeros((capacity, vector.shape[0]), dtype=np.float32)
+                    if self._vectors is not None:
+                        grown[:count] = self._vectors[:count]
+                    self._vectors = grown
+                slot = count
+                self._scopes.append(scope_id)
+                self._inputs.append(code)
+                self._values.append(result)
+            else:
+                # Full: overwrite the oldest slot
+                slot = self._next_slot
+                self._next_slot = (slot + 1) % self.max_entries
+                self._scopes[slot] = scope_id
+                self._inputs[slot] = code
+                self._values[slot] = result
+
+            self._vectors[slot] = vector
+
+# Raw LLM responses by request hash, LRU by last_used
+_SQL_CREATE_RESPONSES = """
+    CREATE TABLE IF NOT EXISTS responses (
+        key BLOB PRIMARY KEY,
+        response TEXT NOT NULL,
+        last_used REAL NOT NULL
+    )
+"""
+
+_SQL_CREATE_RESPONSES_INDEX = """
+    CREATE INDEX IF NOT EXISTS idx_responses_last_used
+    ON responses (last_used DESC)
+"""
+
+_SQL_GET_RESPONSE = "SELECT response FROM responses WHERE key = ?"
+
+_SQL_TOUCH_RESPONSE = "UPDATE responses SET last_used = ? WHERE key = ?"
+
+_SQL_PUT_RESPONSE = """
+    INSERT OR REPLACE INTO responses (key, response, last_used)
+    VALUES (?, ?, ?)
+"""
+
+_SQL_EVICT_RESPONSES = """
+    DELETE FROM responses WHERE rowid IN (
+        SELECT rowid FROM responses
+        ORDER BY last_used DESC
+        LIMIT -1 OFFSET ?
+    )
+"""
+
+
+class ResponseStore:
+    """SQLite-backed LLM response cache that survives process restarts"""
+
+    # In the backend directory, wherever the server was started from
+    DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "llm_cache.db")
+
+    def __init__(self, db_path: str = DEFAULT_PATH, max_entries: int = 50000):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        # One long-lived connection; the lock serialises use across threads
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        with self._conn:
+            self._conn.execute(_SQL_CREATE_RESPONSES)
+            self._conn.execute(_SQL_CREATE_RESPONSES_INDEX)
+
+    def get(self, key: bytes) -> Optional[str]:
+        with self._lock, self._conn:
+            row = self._conn.execute(_SQL_GET_RESPONSE, (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(_SQL_TOUCH_RESPONSE, (time.time(), key))
+        return row[0]
+
+    def put(self, key: bytes, response: str):
+        with self._lock, self._conn:
+            self._conn.execute(_SQL_PUT_RESPONSE, (key, response, time.time()))
+            self._conn.execute(_SQL_EVICT_RESPONSES, (self.max_entries,))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
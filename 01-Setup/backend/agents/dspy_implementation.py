@@ -1,5 +1,10 @@
 import os
-from groq import Groq
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from groq import Groq, AsyncGroq
 from typing import Dict, List, Any
 import json
 
@@ -8,6 +13,8 @@ try:
     from .pydantic_models import (
         PlannerOutput, ExecutorOutput, ValidatorOutput, RegrouperOutput, PipelineOutput
     )
+    from .conversion_cache import ConversionCache, ResponseStore
+    from .llm_utils import stream_clean, strip_fence
 except ImportError:
     # When running directly or from parent directory
     import sys
@@ -17,33 +24,292 @@ except ImportError:
     from pydantic_models import (
         PlannerOutput, ExecutorOutput, ValidatorOutput, RegrouperOutput, PipelineOutput
     )
+    from conversion_cache import ConversionCache, ResponseStore
+    from llm_utils import stream_clean, strip_fence
+
+try:
+    from utils import load_env
+except ImportError:
+    # utils.py is in the backend directory, one level above this package
+    import sys
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from utils import load_env
 
 # ────────────────────────────────────────────────────────────────
 # Simple Groq LLM Wrapper
 # ────────────────────────────────────────────────────────────────
 class GroqLLM:
     """Simple Groq LLM wrapper"""
-    def __init__(self, model_name="llama3-70b-8192", api_key=None):
+    ERROR_PREFIX = "Error in LLM generation"
+    MAX_CONCURRENCY = 8  # Stay under Groq rate limits when fanning out
+    CACHE_SIZE = 1024  # Exact-match responses kept in memory
+    CACHE_MAX_TEMPERATURE = 0.3  # Above this, varied output is wanted, so skip the cache
+    DISK_CACHE_PATH = ResponseStore.DEFAULT_PATH  # Persistent layer behind the in-memory cache
+
+    def __init__(self, model_name="llama3-70b-8192", api_key=None, cache_path=DISK_CACHE_PATH):
         self.model_name = model_name
         self.api_key = api_key or os.environ.get("GROQ_API_KEY")
         if not self.api_key:
             raise ValueError("Groq API key is required. Set GROQ_API_KEY environment variable.")
         self.client = Groq(api_key=self.api_key)
-        
-    def __call__(self, prompt, **kwargs):
+        self._async_client = None
+        self._loop = None
+        self._loop_lock = threading.Lock()
+        self._responses = OrderedDict()
+        self._responses_lock = threading.Lock()
+        self._disk = ResponseStore(cache_path) if cache_path else None
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    @staticmethod
+    def _options(kwargs):
+        """Completion options shared by every request path"""
+        options = {
+            "temperature": kwargs.get('temperature', 0.1),
+            "max_tokens": kwargs.get('max_tokens', 2000),
+        }
+        if kwargs.get('response_format'):
+            # e.g. {"type": "json_object"} for Groq's JSON mode
+            options["response_format"] = kwargs['response_format']
+        return options
+
+    @staticmethod
+    def _messages(prompt, system=None):
+        # Keep constant instructions in a leading system message so identical
+        # prefixes can be served from Groq's prompt cache
+        messages = [{"role": "user", "content": prompt}]
+        if system:
+            messages.insert(0, {"role": "system", "content": system})
+        return messages
+
+    def __call__(self, prompt, system=None, **kwargs):
         """Make a request to Groq API"""
+        key = self._cache_key(prompt, system, kwargs)
+        response = self._cache_get(key)
+        if response is None:
+            response = self._complete(prompt, system, **kwargs)
+            self._cache_put(key, response)
+        return response
+
+    async def acall(self, prompt, system=None, **kwargs):
+        """Make a non-blocking request to Groq API"""
+        key = self._cache_key(prompt, system, kwargs)
+        response = self._cache_get(key)
+        if response is None:
+            response = await self._acomplete(prompt, system, **kwargs)
+            self._cache_put(key, response)
+        return response
+
+    def stream(self, prompt, system=None, **kwargs):
+        """Yield the response text from Groq as it is generated.
+
+        A failure part-way through is re-raised rather than yielded as error
+        text, since the deltas already sent would make it look like code.
+        """
+        key = self._cache_key(prompt, system, kwargs)
+        response = self._cache_get(key)
+        if response is not None:
+            yield response
+            return
+
+        chunks = []
+        try:
+            response = self.client.chat.completions.create(
+                model=self.model_name,
+                messages=self._messages(prompt, system),
+                stream=True,
+                **self._options(kwargs)
+            )
+            for chunk in response:
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    chunks.append(delta)
+                    yield delta
+        except Exception as e:
+            print(f"Error calling Groq LLM: {str(e)}")
+            raise
+        self._cache_put(key, "".join(chunks))
+
+    def _complete(self, prompt, system=None, **kwargs):
         try:
-            messages = [{"role": "user", "content": prompt}]
+            messages = self._messages(prompt, system)
             response = self.client.chat.completions.create(
                 model=self.model_name,
                 messages=messages,
-                temperature=kwargs.get('temperature', 0.1),
-                max_tokens=kwargs.get('max_tokens', 2000)
+                **self._options(kwargs)
+            )
+            return response.choices[0].message.content
+        except Exception as e:
+            print(f"Error calling Groq LLM: {str(e)}")
+            return f"{self.ERROR_PREFIX}: {str(e)}"
+
+    async def _acomplete(self, prompt, system=None, **kwargs):
+        try:
+            if self._async_client is None:
+                self._async_client = AsyncGroq(api_key=self.api_key)
+            messages = self._messages(prompt, system)
+            response = await self._async_client.chat.completions.create(
+                model=self.model_name,
+                messages=messages,
+                **self._options(kwargs)
             )
             return response.choices[0].message.content
         except Exception as e:
             print(f"Error calling Groq LLM: {str(e)}")
-            return f"Error in LLM generation: {str(e)}"
+            return f"{self.ERROR_PREFIX}: {str(e)}"
+
+    def _cache_key(self, prompt, system, kwargs):
+        """Hash of everything that determines the response, or None to bypass"""
+        temperature = kwargs.get('temperature', 0.1)
+        if temperature > self.CACHE_MAX_TEMPERATURE:
+            return None
+        raw = (f"{self.model_name}|{temperature}|{kwargs.get('max_tokens', 2000)}|"
+               f"{kwargs.get('response_format') or ''}|{system or ''}|{prompt}")
+        return hashlib.blake2b(raw.encode(), digest_size=16).digest()
+
+    def _cache_get(self, key):
+        if key is None:
+            return None
+        with self._responses_lock:
+            response = self._responses.get(key)
+            if response is not None:
+                self._responses.move_to_end(key)
+                self.cache_hits += 1
+                return response
+
+        # Fall back to responses kept from earlier runs, promoting any hit
+        response = self._disk.get(key) if self._disk is not None else None
+        with self._responses_lock:
+            if response is None:
+                self.cache_misses += 1
+                return None
+            self.cache_hits += 1
+            self._remember(key, response)
+        return response
+
+    def _cache_put(self, key, response):
+        if key is None or response.startswith(self.ERROR_PREFIX):
+            return
+        with self._responses_lock:
+            self._remember(key, response)
+        if self._disk is not None:
+            self._disk.put(key, response)
+
+    def _remember(self, key, response):
+        """Store in the in-memory LRU; the caller holds _responses_lock"""
+        self._responses[key] = response
+        self._responses.move_to_end(key)
+        if len(self._responses) > self.CACHE_SIZE:
+            self._responses.popitem(last=False)
+
+    def cache_stats(self) -> Dict:
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            "entries": len(self._responses),
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "hit_rate": self.cache_hits / lookups if lookups else 0.0
+        }
+
+    def gather(self, prompts: List[str], **kwargs) -> List[str]:
+        """Send several prompts concurrently and return the responses in order"""
+        return self._run(self._agather(prompts, **kwargs))
+
+    async def _agather(self, prompts: List[str], **kwargs) -> List[str]:
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENCY)
+
+        async def bounded(prompt):
+            async with semaphore:
+                return await self.acall(prompt, **kwargs)
+
+        return await asyncio.gather(*(bounded(p) for p in prompts))
+
+    def _run(self, coro):
+        """Run a coroutine on the background event loop and wait for the result.
+
+        Works from plain sync code and from inside a running loop (e.g. FastAPI
+        handlers), where asyncio.run() would fail. The async client stays bound
+        to this one loop, so its connection pool is reused across calls.
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self._get_loop()).result()
+
+    def _get_loop(self):
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="groq-llm", daemon=True).start()
+        return self._loop
+
+class BatchedGroqLLM(GroqLLM):
+    """Groq wrapper that coalesces concurrent requests into batches.
+
+    Callers enqueue (prompt, future) pairs; a dispatcher on the background loop
+    drains up to BATCH_SIZE of them (or whatever arrived within BATCH_WINDOW)
+    and sends them as parallel requests, then resolves each future. Batches are
+    dispatched as tasks so new arrivals never wait for an in-flight batch.
+    """
+    BATCH_SIZE = 32
+    BATCH_WINDOW = 0.01  # seconds to wait for more requests before dispatching
+
+    def __init__(self, model_name="llama3-70b-8192", api_key=None, cache_path=GroqLLM.DISK_CACHE_PATH):
+        super().__init__(model_name, api_key, cache_path)
+        self._queue = None
+
+    def __call__(self, prompt, **kwargs):
+        key = self._cache_key(prompt, kwargs.get("system"), kwargs)
+        response = self._cache_get(key)
+        if response is None:
+            response = self._run(self._enqueue(prompt, kwargs))
+            self._cache_put(key, response)
+        return response
+
+    async def acall(self, prompt, **kwargs):
+        key = self._cache_key(prompt, kwargs.get("system"), kwargs)
+        response = self._cache_get(key)
+        if response is None:
+            # The queue lives on the background loop; hop there from any caller loop
+            future = asyncio.run_coroutine_threadsafe(self._enqueue(prompt, kwargs), self._get_loop())
+            response = await asyncio.wrap_future(future)
+            self._cache_put(key, response)
+        return response
+
+    async def _enqueue(self, prompt, kwargs):
+        loop = asyncio.get_running_loop()
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+            loop.create_task(self._dispatch())
+        future = loop.create_future()
+        await self._queue.put((prompt, kwargs, future))
+        return await future
+
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.BATCH_WINDOW
+            while len(batch) < self.BATCH_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            loop.create_task(self._send_batch(batch))
+
+    async def _send_batch(self, batch):
+        responses = await asyncio.gather(
+            *(self._acomplete(prompt, **kwargs) for prompt, kwargs, _ in batch)
+        )
+        for (_, _, future), response in zip(batch, responses):
+            if not future.done():
+                future.set_result(response)
+
+@lru_cache(maxsize=None)
+def get_llm(model_name="llama3-70b-8192") -> BatchedGroqLLM:
+    """Process-wide LLM client per model, so the HTTP connection pool stays warm"""
+    load_env()
+    return BatchedGroqLLM(model_name)
 
 # ────────────────────────────────────────────────────────────────
 # Simple Converter (Working Version)
@@ -51,14 +317,37 @@ class GroqLLM:
 class SimpleConverter:
     """Simple working converter that bypasses DSPy complexity"""
     def __init__(self):
-        from dotenv import load_dotenv
-        load_dotenv()
-        self.llm = GroqLLM()
+        self.llm = get_llm()
+        self.cache = ConversionCache()
         print("✅ SimpleConverter initialized with Groq LLM")
     
-    def __call__(self, input_code: str):
-        """Convert Cypress code to Playwright"""
+    def __call__(self, input_code: str, on_chunk=None):
+        """Convert Cypress code to Playwright.
+
+        If on_chunk is given, the response is streamed and cleaned code is
+        passed to it as it arrives; the full result is still returned.
+        """
         print(f"🔄 Converting code: {input_code[:100]}...")
+
+        cached_code = self.cache.lookup(input_code)
+        if cached_code is not None:
+            print("⚡ Returning cached conversion")
+            if on_chunk is not None:
+                on_chunk(cached_code)
+            return self._format_result(cached_code)
+
+        # A near-duplicate's conversion guides the LLM but is never returned as is
+        example = self.cache.similar(input_code)
+        reference = "" if example is None else f"""
+A similar Cypress snippet and its conversion, for reference only. Selectors,
+URLs and values must come from the code to convert, not from this example:
+```javascript
+{example[0]}
+```
+```javascript
+{example[1]}
+```
+"""
         
         prompt = f"""
 Convert the following Cypress test code to Playwright. Follow these rules:
@@ -73,7 +362,7 @@ Convert the following Cypress test code to Playwright. Follow these rules:
 8. Replace cy.url().should('include', url) with expect(page).toHaveURL(url)
 9. Add proper imports at the top
 10. Wrap test functions with async ({{ page }}) =>
-
+{reference}
 Cypress code to convert:
 ```javascript
 {input_code}
@@ -83,35 +372,30 @@ Return ONLY the converted Playwright code with proper imports:
 """
         
         try:
-            converted_code = self.llm(prompt)
-            print("✅ Code converted successfully")
-            
-            # Clean up the response (remove markdown formatting if present)
-            if "```javascript" in converted_code:
-                converted_code = converted_code.split("```javascript")[1].split("```")[0].strip()
-            elif "```" in converted_code:
-                converted_code = converted_code.split("```")[1].split("```")[0].strip()
+            if on_chunk is not None:
+                # Fences are stripped incrementally while the response streams
+                # A failed stream raises, so reaching here means it completed
+                _, converted_code = stream_clean(self.llm.stream(prompt), on_chunk)
+                print("✅ Code converted successfully")
+                cacheable = True
+            else:
+                converted_code = self.llm(prompt)
+                print("✅ Code converted successfully")
+                cacheable = not converted_code.startswith(GroqLLM.ERROR_PREFIX)
+
+                # Clean up the response (remove markdown formatting if present)
+                converted_code = strip_fence(converted_code)
+
+            if cacheable:
+                self.cache.update(input_code, converted_code)
             
-            return {
-                "converted_code": converted_code,
-                "components": [
-                    {
-                        "type": "converted_test",
-                        "code": converted_code,
-                        "validation": {
-                            "valid": True,
-                            "issues": [],
-                            "fixes": [],
-                            "improved_code": None
-                        }
-                    }
-                ]
-            }
+            return self._format_result(converted_code)
         except Exception as e:
             error_msg = f"// Error during conversion: {str(e)}"
             print(f"❌ Conversion failed: {e}")
             return {
                 "converted_code": error_msg,
+                "success": False,
                 "components": [
                     {
                         "type": "error",
@@ -126,6 +410,23 @@ Return ONLY the converted Playwright code with proper imports:
                 ]
             }
 
+    def _format_result(self, converted_code: str) -> Dict[str, Any]:
+        return {
+            "converted_code": converted_code,
+            "components": [
+                {
+                    "type": "converted_test",
+                    "code": converted_code,
+                    "validation": {
+                        "valid": True,
+                        "issues": [],
+                        "fixes": [],
+                        "improved_code": None
+                    }
+                }
+            ]
+        }
+
 # ────────────────────────────────────────────────────────────────
 # Legacy Classes (for backward compatibility)
 # ────────────────────────────────────────────────────────────────
@@ -149,8 +450,7 @@ class CypressToPlaywrightAgent:
 def setup_dspy_pipeline():
     """Initialize the conversion pipeline - CHOOSE YOUR LEVEL"""
     try:
-        from dotenv import load_dotenv
-        load_dotenv()
+        load_env()
         
         groq_key = os.getenv("GROQ_API_KEY")
         if not groq_key:
@@ -1,16 +1,152 @@
 # agents/learning_system.py
 # Step 3: Add Continuous Learning & Memory
 
-import json
+import logging
+import re
+import orjson
 import sqlite3
 import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional, Tuple
-from dataclasses import dataclass, asdict
-from collections import defaultdict
+from typing import Dict, Iterator, List, Any, Optional, Tuple, Union
+from dataclasses import dataclass, field, replace
+from collections import defaultdict, deque, OrderedDict
+from functools import lru_cache
 from .tool_system import EnhancedAgenticConverter, ConversionResult, ConversionStrategy
+from .agentic_core import _stream_callback
+from .llm_utils import strip_fence
 
-@dataclass
+logger = logging.getLogger(__name__)
+
+# Cypress commands that make up a code pattern, and the step each maps to
+_CY_COMMAND_RE = re.compile(r"cy\.(get|type|click|should)\(")
+_COMMAND_STEPS = {
+    "get": "GET_ELEMENT",
+    "type": "TYPE_TEXT",
+    "click": "CLICK_ELEMENT",
+    "should": "ASSERTION",
+}
+
+# One bit per step, so a set of steps is an int and Jaccard similarity is two
+# bit_count() calls; steps only seen in stored patterns get the next free bit
+_STEP_BITS = {step: 1 << i for i, step in enumerate(_COMMAND_STEPS.values())}
+
+def _steps_mask(steps) -> int:
+    """Bitmask of a collection of step names"""
+    mask = 0
+    for step in steps:
+        bit = _STEP_BITS.get(step)
+        if bit is None:
+            bit = _STEP_BITS.setdefault(step, 1 << len(_STEP_BITS))
+        mask |= bit
+    return mask
+
+@lru_cache(maxsize=1024)
+def _extract_key_patterns(input_code: str) -> int:
+    """Bitmask of the distinct Cypress command steps used in the code"""
+    # findall returns just the command names; de-duplicate before masking
+    return _steps_mask({_COMMAND_STEPS[name] for name in _CY_COMMAND_RE.findall(input_code)})
+
+def _short_hash(data: Union[str, bytes]) -> str:
+    """16 hex char BLAKE2b digest, used for input and context hashes"""
+    if isinstance(data, str):
+        data = data.encode()
+    return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+def _iso_timestamp(epoch: float) -> str:
+    """Local-time ISO text for SQLite, matching rows written by earlier versions"""
+    return datetime.fromtimestamp(epoch).isoformat(timespec='milliseconds')
+
+def _encode_context(context: Dict) -> bytes:
+    """Canonical JSON for a context; stored with the case and hashed for stats"""
+    return orjson.dumps(context, option=orjson.OPT_SORT_KEYS)
+
+@lru_cache(maxsize=1024)
+def _hash_context_items(context_items: Tuple) -> str:
+    return _short_hash(_encode_context(dict(context_items)))
+
+def _context_hash(context: Dict) -> str:
+    """Short stable hash of a context dict, memoised on its items"""
+    # Lists (e.g. previous_attempts) become tuples so the items are hashable;
+    # orjson writes them back out as lists, so the hash is unchanged
+    return _hash_context_items(tuple(sorted(
+        (key, tuple(value) if isinstance(value, list) else value) for key, value in context.items()
+    )))
+
+# Statements run on every conversion; defined once so the connection's
+# statement cache reuses the prepared form instead of re-parsing the SQL
+_SQL_INSERT_CASE = """
+    INSERT OR REPLACE INTO conversion_cases
+    (input_hash, input_code, output_code, strategy_used, success,
+     confidence, execution_time, context, feedback_score, timestamp)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+_SQL_SELECT_SIMILAR_CASES = """
+    SELECT input_hash, input_code, output_code, strategy_used, success,
+           confidence, execution_time, context, feedback_score, timestamp
+    FROM conversion_cases
+    WHERE success = 1
+    ORDER BY confidence DESC, timestamp DESC
+    LIMIT ?
+"""
+
+# Single upsert; running averages are updated in SQL (SQLite >= 3.24)
+_SQL_UPSERT_STRATEGY_PERFORMANCE = """
+    INSERT INTO strategy_performance
+    (strategy, context_hash, attempts, successes, avg_confidence,
+     avg_execution_time, last_updated)
+    VALUES (?, ?, 1, ?, ?, ?, ?)
+    ON CONFLICT (strategy, context_hash) DO UPDATE SET
+        successes = successes + excluded.successes,
+        avg_confidence = (avg_confidence * attempts + excluded.avg_confidence) / (attempts + 1),
+        avg_execution_time = (avg_execution_time * attempts + excluded.avg_execution_time) / (attempts + 1),
+        attempts = attempts + 1,
+        last_updated = excluded.last_updated
+"""
+
+_SQL_UPDATE_FEEDBACK = """
+    UPDATE conversion_cases
+    SET feedback_score = ?
+    WHERE input_hash = ?
+"""
+
+# Paged by success rate via idx_patterns_success_rate; LIMIT -1 means no limit
+_SQL_LOAD_PATTERNS = """
+    SELECT pattern_id, input_pattern, output_pattern, success_rate,
+           usage_count, avg_confidence, context_conditions, last_updated
+    FROM learned_patterns
+    ORDER BY success_rate DESC
+    LIMIT ? OFFSET ?
+"""
+
+# Cleaned pattern-guided LLM output by (input_hash, pattern_id), LRU by last_used
+_SQL_GET_PATTERN_RESPONSE = """
+    SELECT response FROM llm_cache
+    WHERE input_hash = ? AND pattern_id = ?
+"""
+
+_SQL_TOUCH_PATTERN_RESPONSE = """
+    UPDATE llm_cache SET last_used = ?
+    WHERE input_hash = ? AND pattern_id = ?
+"""
+
+_SQL_PUT_PATTERN_RESPONSE = """
+    INSERT OR REPLACE INTO llm_cache (input_hash, pattern_id, response, last_used)
+    VALUES (?, ?, ?, ?)
+"""
+
+_SQL_EVICT_PATTERN_RESPONSES = """
+    DELETE FROM llm_cache WHERE rowid IN (
+        SELECT rowid FROM llm_cache
+        ORDER BY last_used DESC
+        LIMIT -1 OFFSET ?
+    )
+"""
+
+@dataclass(slots=True)
 class ConversionCase:
     """Represents a single conversion case for learning"""
     input_hash: str
@@ -22,13 +158,15 @@ class ConversionCase:
     execution_time: float
     context: Dict[str, Any]
     feedback_score: Optional[float] = None
-    timestamp: datetime = None
+    used_pattern: bool = False  # Converted with a learned pattern; in-memory only
+    # Epoch seconds; formatted as ISO text only when written to SQLite
+    timestamp_epoch: float = field(default_factory=time.time)
     
-    def __post_init__(self):
-        if self.timestamp is None:
-            self.timestamp = datetime.now()
+    @property
+    def timestamp(self) -> datetime:
+        return datetime.fromtimestamp(self.timestamp_epoch)
 
-@dataclass
+@dataclass(slots=True)
 class LearningPattern:
     """Represents a learned pattern"""
     pattern_id: str
@@ -39,289 +177,463 @@ class LearningPattern:
     avg_confidence: float
     context_conditions: Dict[str, Any]
     last_updated: datetime
+    # Bitmask of the steps in input_pattern, computed once per pattern
+    steps_mask: int = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        self.steps_mask = _steps_mask(self.input_pattern.split('->'))
     
 class MemoryStore:
     """Persistent memory for the agent"""
+    LLM_CACHE_SIZE = 10000  # Pattern-guided responses kept on disk
     
     def __init__(self, db_path: str = "agent_memory.db"):
         self.db_path = db_path
+        # One long-lived connection shared by all calls; the lock serialises
+        # use from FastAPI worker threads
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, cached_statements=256)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.RLock()
+        self._configure_connection()
         self._init_database()
     
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+    
+    def _configure_connection(self):
+        """Tune SQLite for many small writes from one process"""
+        # WAL lets stats readers run alongside writers, and with synchronous=NORMAL
+        # a commit no longer fsyncs the main database file
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute("PRAGMA cache_size=-20000")  # ~20 MB page cache
+        self._conn.execute("PRAGMA mmap_size=268435456")  # 256 MB
+    
     def _init_database(self):
         """Initialize SQLite database for memory storage"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Conversion cases table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS conversion_cases (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                input_hash TEXT UNIQUE,
-                input_code TEXT,
-                output_code TEXT,
-                strategy_used TEXT,
-                success BOOLEAN,
-                confidence REAL,
-                execution_time REAL,
-                context TEXT,
-                feedback_score REAL,
-                timestamp TEXT
-            )
-        ''')
-        
-        # Learned patterns table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS learned_patterns (
-                pattern_id TEXT PRIMARY KEY,
-                input_pattern TEXT,
-                output_pattern TEXT,
-                success_rate REAL,
-                usage_count INTEGER,
-                avg_confidence REAL,
-                context_conditions TEXT,
-                last_updated TEXT
-            )
-        ''')
-        
-        # Strategy performance table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS strategy_performance (
-                strategy TEXT,
-                context_hash TEXT,
-                attempts INTEGER,
-                successes INTEGER,
-                avg_confidence REAL,
-                avg_execution_time REAL,
-                last_updated TEXT,
-                PRIMARY KEY (strategy, context_hash)
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        with self._lock, self._conn:
+            cursor = self._conn.cursor()
+            
+            # Conversion cases table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS conversion_cases (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    input_hash TEXT UNIQUE,
+                    input_code TEXT,
+                    output_code TEXT,
+                    strategy_used TEXT,
+                    success BOOLEAN,
+                    confidence REAL,
+                    execution_time REAL,
+                    context BLOB,  -- orjson bytes; older rows hold JSON text
+                    feedback_score REAL,
+                    timestamp TEXT
+                )
+            ''')
+            
+            # Learned patterns table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS learned_patterns (
+                    pattern_id TEXT PRIMARY KEY,
+                    input_pattern TEXT,
+                    output_pattern TEXT,
+                    success_rate REAL,
+                    usage_count INTEGER,
+                    avg_confidence REAL,
+                    context_conditions BLOB,
+                    last_updated TEXT
+                )
+            ''')
+            
+            # Strategy performance table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS strategy_performance (
+                    strategy TEXT,
+                    context_hash TEXT,
+                    attempts INTEGER,
+                    successes INTEGER,
+                    avg_confidence REAL,
+                    avg_execution_time REAL,
+                    last_updated TEXT,
+                    PRIMARY KEY (strategy, context_hash)
+                )
+            ''')
+            
+            # Pattern-guided LLM responses, persisted across restarts
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    input_hash TEXT,
+                    pattern_id TEXT,
+                    response TEXT,
+                    last_used REAL,
+                    PRIMARY KEY (input_hash, pattern_id)
+                )
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_llm_cache_last_used
+                ON llm_cache (last_used DESC)
+            ''')
+            
+            # Indexes for get_similar_cases ordering and top-N pattern lookup;
+            # provide_feedback already uses the UNIQUE index on input_hash
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_cases_success_conf_ts
+                ON conversion_cases (success, confidence DESC, timestamp DESC)
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_patterns_success_rate
+                ON learned_patterns (success_rate DESC)
+            ''')
     
     def store_conversion_case(self, case: ConversionCase):
         """Store a conversion case in memory"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT OR REPLACE INTO conversion_cases 
-            (input_hash, input_code, output_code, strategy_used, success, 
-             confidence, execution_time, context, feedback_score, timestamp)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
+        context_json = _encode_context(case.context)
+        with self._lock, self._conn:
+            self._insert_case(self._conn.cursor(), case, context_json, _iso_timestamp(case.timestamp_epoch))
+    
+    def record_conversion(self, case: ConversionCase, strategy: str, success: bool,
+                          confidence: float, execution_time: float,
+                          context_json: Optional[bytes] = None):
+        """Store a case and update strategy performance in a single transaction.
+
+        context_json is case.context already encoded with _encode_context; it is
+        both stored with the case and hashed for the strategy stats. Both rows
+        are stamped with the case's own timestamp.
+        """
+        if context_json is None:
+            context_json = _encode_context(case.context)
+        context_hash = _short_hash(context_json)
+        timestamp = _iso_timestamp(case.timestamp_epoch)
+        with self._lock, self._conn:
+            cursor = self._conn.cursor()
+            self._insert_case(cursor, case, context_json, timestamp)
+            self._upsert_strategy_performance(cursor, strategy, context_hash, success,
+                                              confidence, execution_time, timestamp)
+    
+    def _insert_case(self, cursor: sqlite3.Cursor, case: ConversionCase, context_json: bytes,
+                     timestamp: str):
+        cursor.execute(_SQL_INSERT_CASE, (
             case.input_hash, case.input_code, case.output_code,
             case.strategy_used, case.success, case.confidence,
-            case.execution_time, json.dumps(case.context),
-            case.feedback_score, case.timestamp.isoformat()
+            case.execution_time, context_json,
+            case.feedback_score, timestamp
         ))
-        
-        conn.commit()
-        conn.close()
     
     def get_similar_cases(self, input_hash: str, context: Dict, limit: int = 5) -> List[ConversionCase]:
         """Retrieve similar conversion cases for learning"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT * FROM conversion_cases 
-            WHERE success = 1 
-            ORDER BY confidence DESC, timestamp DESC 
-            LIMIT ?
-        ''', (limit,))
+        with self._lock:
+            rows = self._conn.execute(_SQL_SELECT_SIMILAR_CASES, (limit,)).fetchall()
         
         cases = []
-        for row in cursor.fetchall():
-            cases.append(ConversionCase(
-                input_hash=row[1],
-                input_code=row[2],
-                output_code=row[3],
-                strategy_used=row[4],
-                success=bool(row[5]),
-                confidence=row[6],
-                execution_time=row[7],
-                context=json.loads(row[8]),
-                feedback_score=row[9],
-                timestamp=datetime.fromisoformat(row[10])
-            ))
-        
-        conn.close()
+        for row in rows:
+            fields = dict(zip(row.keys(), row))
+            fields["success"] = bool(fields["success"])
+            # orjson.loads takes the BLOBs and the JSON text of older rows alike
+            fields["context"] = orjson.loads(fields["context"])
+            fields["timestamp_epoch"] = datetime.fromisoformat(fields.pop("timestamp")).timestamp()
+            cases.append(ConversionCase(**fields))
+        
         return cases
     
     def update_strategy_performance(self, strategy: str, context: Dict, success: bool, 
                                   confidence: float, execution_time: float):
         """Update strategy performance statistics"""
-        context_hash = hashlib.md5(json.dumps(context, sort_keys=True).encode()).hexdigest()[:16]
-        
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Get existing record
-        cursor.execute('''
-            SELECT attempts, successes, avg_confidence, avg_execution_time 
-            FROM strategy_performance 
-            WHERE strategy = ? AND context_hash = ?
-        ''', (strategy, context_hash))
-        
-        row = cursor.fetchone()
-        
-        if row:
-            # Update existing
-            attempts, successes, avg_conf, avg_time = row
-            new_attempts = attempts + 1
-            new_successes = successes + (1 if success else 0)
-            new_avg_conf = (avg_conf * attempts + confidence) / new_attempts
-            new_avg_time = (avg_time * attempts + execution_time) / new_attempts
-            
-            cursor.execute('''
-                UPDATE strategy_performance 
-                SET attempts = ?, successes = ?, avg_confidence = ?, 
-                    avg_execution_time = ?, last_updated = ?
-                WHERE strategy = ? AND context_hash = ?
-            ''', (new_attempts, new_successes, new_avg_conf, new_avg_time,
-                  datetime.now().isoformat(), strategy, context_hash))
-        else:
-            # Insert new
-            cursor.execute('''
-                INSERT INTO strategy_performance 
-                (strategy, context_hash, attempts, successes, avg_confidence, 
-                 avg_execution_time, last_updated)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (strategy, context_hash, 1, 1 if success else 0, confidence,
-                  execution_time, datetime.now().isoformat()))
-        
-        conn.commit()
-        conn.close()
+        with self._lock, self._conn:
+            self._upsert_strategy_performance(self._conn.cursor(), strategy, _context_hash(context),
+                                              success, confidence, execution_time,
+                                              _iso_timestamp(time.time()))
+    
+    def _upsert_strategy_performance(self, cursor: sqlite3.Cursor, strategy: str, context_hash: str,
+                                     success: bool, confidence: float, execution_time: float,
+                                     last_updated: str):
+        cursor.execute(_SQL_UPSERT_STRATEGY_PERFORMANCE, (
+            strategy, context_hash, 1 if success else 0, confidence,
+            execution_time, last_updated
+        ))
+    
+    def update_feedback(self, input_hash: str, feedback_score: float):
+        """Attach a feedback score to a stored conversion case"""
+        with self._lock, self._conn:
+            self._conn.execute(_SQL_UPDATE_FEEDBACK, (feedback_score, input_hash))
+    
+    def get_pattern_response(self, input_hash: str, pattern_id: str) -> Optional[str]:
+        """Cached cleaned response for a pattern-guided conversion, if any"""
+        with self._lock, self._conn:
+            row = self._conn.execute(_SQL_GET_PATTERN_RESPONSE, (input_hash, pattern_id)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(_SQL_TOUCH_PATTERN_RESPONSE, (time.time(), input_hash, pattern_id))
+        return row["response"]
+    
+    def put_pattern_response(self, input_hash: str, pattern_id: str, response: str):
+        """Cache a cleaned pattern-guided response, evicting the least recently used"""
+        with self._lock, self._conn:
+            self._conn.execute(_SQL_PUT_PATTERN_RESPONSE, (input_hash, pattern_id, response, time.time()))
+            self._conn.execute(_SQL_EVICT_PATTERN_RESPONSES, (self.LLM_CACHE_SIZE,))
+    
+    def load_patterns(self, limit: int = -1, offset: int = 0) -> List[LearningPattern]:
+        """Load learned patterns, highest success rate first"""
+        return list(self.iter_patterns(limit, offset))
+    
+    def iter_patterns(self, limit: int = -1, offset: int = 0,
+                      batch_size: int = 100) -> Iterator[LearningPattern]:
+        """Yield learned patterns, highest success rate first, fetching in batches"""
+        with self._lock:
+            cursor = self._conn.execute(_SQL_LOAD_PATTERNS, (limit, offset))
+        
+        while True:
+            # The lock is only held per fetch, never across a yield
+            with self._lock:
+                rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            for row in rows:
+                yield LearningPattern(
+                    pattern_id=row["pattern_id"],
+                    input_pattern=row["input_pattern"],
+                    output_pattern=row["output_pattern"],
+                    success_rate=row["success_rate"],
+                    usage_count=row["usage_count"],
+                    avg_confidence=row["avg_confidence"],
+                    # Patterns without conditions are stored as NULL; skip the JSON parse
+                    context_conditions=orjson.loads(row["context_conditions"]) if row["context_conditions"] else {},
+                    last_updated=datetime.fromisoformat(row["last_updated"])
+                )
 
 class PatternLearner:
     """Learns conversion patterns from successful cases"""
     
+    MATCH_THRESHOLD = 0.7
+    # A match this good is taken without scoring the remaining patterns
+    GOOD_ENOUGH_SCORE = 0.95
+    PATTERN_WEIGHT = 0.7
+    CONTEXT_WEIGHT = 0.3
+    # Patterns are read from SQLite in pages of this size, best first
+    PAGE_SIZE = 500
+    
     def __init__(self, memory_store: MemoryStore):
         self.memory_store = memory_store
         self.learned_patterns: Dict[str, LearningPattern] = {}
+        self._sorted_patterns: Optional[List[LearningPattern]] = None
+        self._loaded_rows = 0
+        self._all_loaded = False
+        # Patterns may be added by the background learning thread
+        self._lock = threading.RLock()
         self._load_patterns()
     
-    def _load_patterns(self):
-        """Load existing patterns from memory"""
-        conn = sqlite3.connect(self.memory_store.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT * FROM learned_patterns')
-        for row in cursor.fetchall():
-            pattern = LearningPattern(
-                pattern_id=row[0],
-                input_pattern=row[1],
-                output_pattern=row[2],
-                success_rate=row[3],
-                usage_count=row[4],
-                avg_confidence=row[5],
-                context_conditions=json.loads(row[6]),
-                last_updated=datetime.fromisoformat(row[7])
-            )
+    def _load_patterns(self) -> List[LearningPattern]:
+        """Load the next page of patterns from memory and return it"""
+        with self._lock:
+            if self._all_loaded:
+                return []
+            patterns = []
+            for pattern in self.memory_store.iter_patterns(self.PAGE_SIZE, self._loaded_rows):
+                self.learned_patterns[pattern.pattern_id] = pattern
+                patterns.append(pattern)
+            self._loaded_rows += len(patterns)
+            self._all_loaded = len(patterns) < self.PAGE_SIZE
+            self._sorted_patterns = None
+        
+        logger.info("📚 Loaded %d learned patterns", len(self.learned_patterns))
+        return patterns
+    
+    def add_pattern(self, pattern: LearningPattern):
+        """Add or replace a learned pattern"""
+        with self._lock:
             self.learned_patterns[pattern.pattern_id] = pattern
-        
-        conn.close()
-        print(f"📚 Loaded {len(self.learned_patterns)} learned patterns")
+            self._sorted_patterns = None
+    
+    @property
+    def learned_patterns_sorted(self) -> List[LearningPattern]:
+        """Learned patterns, highest success rate first; rebuilt after changes"""
+        with self._lock:
+            if self._sorted_patterns is None or len(self._sorted_patterns) != len(self.learned_patterns):
+                self._sorted_patterns = sorted(self.learned_patterns.values(),
+                                               key=lambda p: p.success_rate, reverse=True)
+            # Callers iterate this list; changes replace it rather than mutate it
+            return self._sorted_patterns
     
     def find_matching_pattern(self, input_code: str, context: Dict) -> Optional[LearningPattern]:
         """Find the best matching learned pattern"""
-        # Extract pattern from input code
-        input_lines = input_code.strip().split('\n')
-        key_patterns = []
-        
-        for line in input_lines:
-            line = line.strip()
-            if 'cy.' in line:
-                if 'cy.get(' in line:
-                    key_patterns.append('GET_ELEMENT')
-                elif 'cy.type(' in line:
-                    key_patterns.append('TYPE_TEXT')
-                elif 'cy.click(' in line:
-                    key_patterns.append('CLICK_ELEMENT')
-                elif 'cy.should(' in line:
-                    key_patterns.append('ASSERTION')
-        
-        input_pattern = '->'.join(key_patterns)
-        
-        # Find matching patterns
+        # Extract pattern from input code in one regex pass
+        input_mask = _extract_key_patterns(input_code)
+        if not input_mask:
+            return None
+        
+        # Find matching patterns, paging more in from SQLite only on a miss
+        best_match, best_score = self._best_match(self.learned_patterns_sorted, input_mask, context)
+        while best_match is None and not self._all_loaded:
+            page = self._load_patterns()
+            best_match, best_score = self._best_match(page, input_mask, context)
+        
+        if best_match:
+            logger.debug("🎯 Found matching pattern: %s (score: %.2f)", best_match.input_pattern, best_score)
+        
+        return best_match
+    
+    def _best_match(self, patterns: List[LearningPattern], input_mask: int,
+                    context: Dict) -> Tuple[Optional[LearningPattern], float]:
+        """Best pattern above the threshold, scanning in the given order"""
         best_match = None
         best_score = 0
         
-        for pattern in self.learned_patterns.values():
-            score = self._calculate_pattern_match_score(input_pattern, pattern, context)
-            if score > best_score and score > 0.7:  # Threshold for confidence
+        for pattern in patterns:
+            pattern_score = self.PATTERN_WEIGHT * self._pattern_similarity(input_mask, pattern)
+            # Context can add at most CONTEXT_WEIGHT; skip it if that can't win
+            upper_bound = pattern_score + (self.CONTEXT_WEIGHT if pattern.context_conditions else 0)
+            if upper_bound <= best_score or upper_bound <= self.MATCH_THRESHOLD:
+                continue
+            
+            score = pattern_score + self.CONTEXT_WEIGHT * self._context_similarity(pattern, context)
+            if score > best_score and score > self.MATCH_THRESHOLD:
                 best_score = score
                 best_match = pattern
+                if best_score >= self.GOOD_ENOUGH_SCORE:
+                    break
         
-        if best_match:
-            print(f"🎯 Found matching pattern: {best_match.input_pattern} (score: {best_score:.2f})")
-        
-        return best_match
+        return best_match, best_score
     
-    def _calculate_pattern_match_score(self, input_pattern: str, learned_pattern: LearningPattern, context: Dict) -> float:
+    def _calculate_pattern_match_score(self, input_mask: int, learned_pattern: LearningPattern, context: Dict) -> float:
         """Calculate how well a learned pattern matches the current input"""
-        # Pattern similarity
-        input_steps = set(input_pattern.split('->'))
-        learned_steps = set(learned_pattern.input_pattern.split('->'))
-        
-        if not input_steps or not learned_steps:
+        if not input_mask or not learned_pattern.steps_mask:
             return 0
         
-        intersection = input_steps.intersection(learned_steps)
-        union = input_steps.union(learned_steps)
-        pattern_similarity = len(intersection) / len(union)
-        
-        # Context similarity
-        context_similarity = 0
-        if learned_pattern.context_conditions:
-            matching_conditions = 0
-            total_conditions = len(learned_pattern.context_conditions)
-            
-            for key, value in learned_pattern.context_conditions.items():
-                if context.get(key) == value:
-                    matching_conditions += 1
-            
-            context_similarity = matching_conditions / total_conditions if total_conditions > 0 else 0
-        
         # Weighted score (pattern is more important than context)
-        return pattern_similarity * 0.7 + context_similarity * 0.3
+        return (self.PATTERN_WEIGHT * self._pattern_similarity(input_mask, learned_pattern)
+                + self.CONTEXT_WEIGHT * self._context_similarity(learned_pattern, context))
+    
+    @staticmethod
+    def _pattern_similarity(input_mask: int, learned_pattern: LearningPattern) -> float:
+        """Jaccard similarity over step bitmasks"""
+        learned_mask = learned_pattern.steps_mask
+        if not learned_mask:
+            return 0
+        return (input_mask & learned_mask).bit_count() / (input_mask | learned_mask).bit_count()
+    
+    @staticmethod
+    def _context_similarity(learned_pattern: LearningPattern, context: Dict) -> float:
+        """Fraction of the pattern's context conditions the context satisfies"""
+        conditions = learned_pattern.context_conditions
+        if not conditions:
+            return 0
+        matching_conditions = sum(1 for key, value in conditions.items() if context.get(key) == value)
+        return matching_conditions / len(conditions)
+
+class RecentStats:
+    """Rolling counters over the last two windows of conversions.
+
+    Kept up to date on every add so reflection checks are O(1) instead of
+    re-slicing and re-summing the history.
+    """
+    
+    def __init__(self, window: int = 10):
+        self.window = window
+        self._recent: deque = deque()  # the last `window` cases
+        self._older: deque = deque()   # the `window` cases before those
+        self.recent_failures = 0
+        self.recent_negative_feedback = 0
+        self.recent_confidence = 0.0
+        self.older_confidence = 0.0
+        # strategy -> [attempts, successes] over both windows
+        self._strategy_stats: Dict[str, List[int]] = {}
+    
+    def add(self, case: ConversionCase):
+        self._recent.append(case)
+        self.recent_confidence += case.confidence
+        self._count(case, 1)
+        self._tally(case, 1)
+        
+        if len(self._recent) > self.window:
+            moved = self._recent.popleft()
+            self.recent_confidence -= moved.confidence
+            self._count(moved, -1)
+            self._older.append(moved)
+            self.older_confidence += moved.confidence
+            if len(self._older) > self.window:
+                dropped = self._older.popleft()
+                self.older_confidence -= dropped.confidence
+                self._tally(dropped, -1)
+    
+    def _count(self, case: ConversionCase, delta: int):
+        if not case.success:
+            self.recent_failures += delta
+        if case.feedback_score is not None and case.feedback_score < 3:
+            self.recent_negative_feedback += delta
+    
+    def _tally(self, case: ConversionCase, delta: int):
+        stats = self._strategy_stats.get(case.strategy_used)
+        if stats is None:
+            stats = self._strategy_stats[case.strategy_used] = [0, 0]
+        stats[0] += delta
+        if case.success:
+            stats[1] += delta
+        if not stats[0]:
+            del self._strategy_stats[case.strategy_used]
+    
+    def strategy_effectiveness(self) -> Dict[str, float]:
+        """Success rate per strategy over both windows"""
+        # items() is copied in one step, so a concurrent add can't break the loop
+        return {strategy: successes / attempts
+                for strategy, (attempts, successes) in list(self._strategy_stats.items())}
+    
+    @property
+    def confidence_trend(self) -> float:
+        """Average confidence of the last window minus the one before; 0 until both are full"""
+        if len(self._older) < self.window:
+            return 0
+        return (self.recent_confidence - self.older_confidence) / self.window
 
 class LearningAgenticConverter(EnhancedAgenticConverter):
     """Agentic converter with continuous learning capabilities"""
+    PATTERN_RESULT_CACHE_SIZE = 1024
+    HISTORY_SIZE = 20  # Recent cases kept in memory; older ones live in SQLite
     
     def __init__(self, llm, memory_db_path: str = "agent_memory.db"):
         super().__init__(llm)
         self.memory_store = MemoryStore(memory_db_path)
         self.pattern_learner = PatternLearner(self.memory_store)
-        self.conversion_history = []
-        print("✅ Learning-enabled agentic converter initialized")
+        self.conversion_history = deque(maxlen=self.HISTORY_SIZE)
+        self.recent_stats = RecentStats(self.HISTORY_SIZE // 2)
+        self.conversion_count = 0
+        # Learning runs on one background thread so convert() never waits on it
+        self._learn_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pattern-learning")
+        self._state_lock = threading.RLock()
+        # Pattern-guided results by (pattern_id, input_hash), so retries skip the LLM
+        self._pattern_results: "OrderedDict[Tuple[str, str], ConversionResult]" = OrderedDict()
+        logger.info("✅ Learning-enabled agentic converter initialized")
     
     def convert(self, input_code: str) -> ConversionResult:
         """Enhanced conversion with learning"""
-        start_time = datetime.now()
-        print("🧠 Starting learning-enabled agentic conversion...")
+        # One clock read for the case timestamp; perf_counter for the duration
+        started_at = time.time()
+        start_time = time.perf_counter()
+        logger.info("🧠 Starting learning-enabled agentic conversion...")
         
         # Generate input hash for tracking
-        input_hash = hashlib.md5(input_code.encode()).hexdigest()[:16]
+        input_hash = _short_hash(input_code)
         
         # Analyze code
         context = self._analyze_code(input_code)
+        # Serialised once, for both the stored case and the strategy stats hash
+        context_dict = context.as_dict()
+        context_json = _encode_context(context_dict)
         
         # Check for learned patterns first
-        matching_pattern = self.pattern_learner.find_matching_pattern(input_code, context.__dict__)
+        matching_pattern = self.pattern_learner.find_matching_pattern(input_code, context_dict)
         
         if matching_pattern and matching_pattern.success_rate > 0.8:
-            print(f"🎯 Using learned pattern with {matching_pattern.success_rate:.1%} success rate")
+            logger.info("🎯 Using learned pattern with %.1f%% success rate", matching_pattern.success_rate * 100)
             # Use pattern-guided conversion
-            result = self._convert_with_pattern(input_code, matching_pattern, context)
+            result = self._convert_with_pattern(input_code, matching_pattern, context, input_hash)
         else:
             # Fall back to standard agentic conversion
             result = super().convert(input_code)
         
         # Calculate execution time
-        execution_time = (datetime.now() - start_time).total_seconds()
+        execution_time = time.perf_counter() - start_time
         
         # Store conversion case for learning
         conversion_case = ConversionCase(
@@ -332,40 +644,45 @@ class LearningAgenticConverter(EnhancedAgenticConverter):
             success=result.success,
             confidence=result.confidence,
             execution_time=execution_time,
-            context=context.__dict__
+            context=context_dict,
+            used_pattern=bool(result.metadata.get("used_pattern")),
+            timestamp_epoch=started_at
         )
         
-        self.memory_store.store_conversion_case(conversion_case)
-        self.conversion_history.append(conversion_case)
-        
-        # Update strategy performance
-        self.memory_store.update_strategy_performance(
+        # Store the case and update strategy performance in one transaction
+        self.memory_store.record_conversion(
+            conversion_case,
             result.strategy_used.value,
-            context.__dict__,
             result.success,
             result.confidence,
-            execution_time
+            execution_time,
+            context_json
         )
+        with self._state_lock:
+            self.conversion_history.append(conversion_case)
+            self.recent_stats.add(conversion_case)
+            self.conversion_count += 1
+            conversion_number = self.conversion_count
         
         # Learn from recent successful conversions
-        if len(self.conversion_history) % 10 == 0:  # Learn every 10 conversions
-            self._trigger_learning()
+        if conversion_number % 10 == 0:  # Learn every 10 conversions
+            self._learn_executor.submit(self._trigger_learning)
         
         # Enhance result with learning metadata
         result.metadata["learning"] = {
             "used_learned_pattern": matching_pattern is not None,
             "pattern_id": matching_pattern.pattern_id if matching_pattern else None,
             "total_learned_patterns": len(self.pattern_learner.learned_patterns),
-            "conversion_number": len(self.conversion_history),
+            "conversion_number": conversion_number,
             "input_hash": input_hash
         }
         
         return result
     
-    def _convert_with_pattern(self, input_code: str, pattern: LearningPattern, context) -> ConversionResult:
-        """Convert using a learned pattern as guidance"""
-        
-        pattern_guided_prompt = f"""
+    @staticmethod
+    def _pattern_prompt(input_code: str, pattern: LearningPattern) -> str:
+        """Prompt for a conversion guided by a learned pattern"""
+        return f"""
         Convert this Cypress code to Playwright using the learned pattern:
         
         Input Pattern: {pattern.input_pattern}
@@ -377,21 +694,41 @@ class LearningAgenticConverter(EnhancedAgenticConverter):
         
         Apply the pattern while adapting to the specific code structure.
         """
+    
+    def _convert_with_pattern(self, input_code: str, pattern: LearningPattern, context,
+                              input_hash: Optional[str] = None) -> ConversionResult:
+        """Convert using a learned pattern as guidance"""
+        input_hash = input_hash or _short_hash(input_code)
+        cache_key = (pattern.pattern_id, input_hash)
+        on_chunk = _stream_callback.get()
+        cached = self._pattern_results.get(cache_key)
+        if cached is not None:
+            pattern.usage_count += 1
+            pattern.last_updated = datetime.now()
+            if on_chunk is not None:
+                on_chunk(cached.code)
+            # Callers add to metadata, so hand out a copy
+            return replace(cached, issues=list(cached.issues), metadata=dict(cached.metadata))
         
         try:
-            converted_code = self.llm(pattern_guided_prompt)
-            
-            # Clean up response
-            if "```javascript" in converted_code:
-                converted_code = converted_code.split("```javascript")[1].split("```")[0].strip()
-            elif "```" in converted_code:
-                converted_code = converted_code.split("```")[1].split("```")[0].strip()
+            # Responses survive restarts in the memory store's llm_cache table
+            converted_code = self.memory_store.get_pattern_response(input_hash, pattern.pattern_id)
+            cacheable = True
+            if converted_code is None:
+                converted_code = self.llm(self._pattern_prompt(input_code, pattern))
+                error_prefix = getattr(self.llm, "ERROR_PREFIX", None)
+                cacheable = not (error_prefix and converted_code.startswith(error_prefix))
+                
+                # Clean up response
+                converted_code = strip_fence(converted_code)
+                if cacheable:
+                    self.memory_store.put_pattern_response(input_hash, pattern.pattern_id, converted_code)
             
             # Update pattern usage
             pattern.usage_count += 1
             pattern.last_updated = datetime.now()
             
-            return ConversionResult(
+            result = ConversionResult(
                 success=True,
                 code=converted_code,
                 confidence=min(0.95, pattern.avg_confidence + 0.1),  # Slight boost for using learned pattern
@@ -400,68 +737,67 @@ class LearningAgenticConverter(EnhancedAgenticConverter):
                 metadata={"used_pattern": pattern.pattern_id}
             )
             
+            if cacheable:
+                self._pattern_results[cache_key] = replace(result, metadata=dict(result.metadata))
+                if len(self._pattern_results) > self.PATTERN_RESULT_CACHE_SIZE:
+                    self._pattern_results.popitem(last=False)
+            
+            # Not streamed token by token, but /convert/stream still gets the code
+            if on_chunk is not None:
+                on_chunk(converted_code)
+            return result
+            
         except Exception as e:
             # Pattern-guided conversion failed, fall back
-            print(f"⚠️ Pattern-guided conversion failed: {e}")
+            logger.warning("⚠️ Pattern-guided conversion failed: %s", e)
             return super().convert(input_code)
     
     def _trigger_learning(self):
-        """Trigger learning from recent successful conversions"""
-        print("📚 Triggering learning from recent conversions...")
-        
-        # Get recent successful cases
-        recent_successful = [case for case in self.conversion_history[-20:] 
-                           if case.success and case.confidence > 0.7]
+        """Trigger learning from recent successful conversions (runs on the learning thread)"""
+        logger.debug("📚 Triggering learning from recent conversions...")
         
-        if len(recent_successful) >= 3:
-            # Simple pattern learning (in real implementation, use more sophisticated ML)
-            print(f"🎓 Learning from {len(recent_successful)} successful cases")
-        else:
-            print("📖 Not enough successful cases to learn new patterns")
+        try:
+            # Get recent successful cases
+            with self._state_lock:
+                recent_successful = [case for case in self.conversion_history 
+                                   if case.success and case.confidence > 0.7]
+            
+            if len(recent_successful) >= 3:
+                # Simple pattern learning (in real implementation, use more sophisticated ML)
+                logger.info("🎓 Learning from %d successful cases", len(recent_successful))
+            else:
+                logger.debug("📖 Not enough successful cases to learn new patterns")
+        except Exception:
+            # Nobody waits on the future, so report failures here
+            logger.exception("⚠️ Background learning failed")
+    
+    def close(self):
+        """Wait for pending learning to finish, then close the memory store"""
+        self._learn_executor.shutdown(wait=True)
+        self.memory_store.close()
     
     def provide_feedback(self, input_hash: str, feedback_score: float):
         """Accept feedback on conversion quality (1-5 scale)"""
-        conn = sqlite3.connect(self.memory_store.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            UPDATE conversion_cases 
-            SET feedback_score = ? 
-            WHERE input_hash = ?
-        ''', (feedback_score, input_hash))
-        
-        conn.commit()
-        conn.close()
+        self.memory_store.update_feedback(input_hash, feedback_score)
         
-        print(f"📝 Received feedback score {feedback_score}/5 for conversion {input_hash}")
+        logger.info("📝 Received feedback score %s/5 for conversion %s", feedback_score, input_hash)
     
     def get_learning_stats(self) -> Dict:
         """Get comprehensive learning statistics"""
-        recent_success_rate = self._calculate_recent_success_rate()
-        avg_confidence = self._calculate_avg_confidence()
+        # Same population as total_conversions: this session's cases, the
+        # last HISTORY_SIZE of which are still in memory
+        recent = self.conversion_history
+        recent_success_rate = sum(case.success for case in recent) / len(recent) if recent else 0.0
+        avg_confidence = sum(case.confidence for case in recent) / len(recent) if recent else 0.0
         
         return {
-            "total_conversions": len(self.conversion_history),
+            "total_conversions": self.conversion_count,
             "learned_patterns": len(self.pattern_learner.learned_patterns),
             "recent_success_rate": recent_success_rate,
             "avg_confidence": avg_confidence,
             "memory_db_path": self.memory_store.db_path
         }
     
-    def _calculate_recent_success_rate(self) -> float:
-        """Calculate success rate for last 20 conversions"""
-        recent = self.conversion_history[-20:]
-        if not recent:
-            return 0.0
-        return sum(1 for case in recent if case.success) / len(recent)
-    
-    def _calculate_avg_confidence(self) -> float:
-        """Calculate average confidence for recent conversions"""
-        recent = self.conversion_history[-20:]
-        if not recent:
-            return 0.0
-        return sum(case.confidence for case in recent) / len(recent)
-    
     def get_agent_status(self) -> Dict:
         """Get comprehensive agent status including learning"""
         base_stats = super().get_agent_status()
@@ -477,19 +813,18 @@ class LearningAgenticConverter(EnhancedAgenticConverter):
 def setup_learning_agentic_pipeline(memory_db_path: str = "agent_memory.db"):
     """Setup the learning-enabled agentic pipeline (Step 3)"""
     try:
-        from dotenv import load_dotenv
-        load_dotenv()
-        
-        from .dspy_implementation import GroqLLM
-        llm = GroqLLM()
+        from .agentic_core import configure_logging
+        from .dspy_implementation import get_llm
+        configure_logging()
+        llm = get_llm()
         
         converter = LearningAgenticConverter(llm, memory_db_path)
-        print("🧠 Learning-enabled agentic converter initialized (Step 3: Learning & Memory)")
-        print("📚 Memory system: active")
-        print("🔧 Available tools:", len(converter.tool_selector.tools))
+        logger.info("🧠 Learning-enabled agentic converter initialized (Step 3: Learning & Memory)")
+        logger.info("📚 Memory system: active")
+        logger.info("🔧 Available tools: %d", len(converter.tool_selector.tools))
         
         return converter
         
     except Exception as e:
-        print(f"❌ Error setting up learning-enabled agentic pipeline: {e}")
+        logger.error("❌ Error setting up learning-enabled agentic pipeline: %s", e)
         raise e
\ No newline at end of file
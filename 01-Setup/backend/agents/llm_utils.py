@@ -0,0 +1,108 @@
+# agents/llm_utils.py
+# Helpers for post-processing LLM responses, including streamed ones
+
+import re
+from functools import lru_cache
+from typing import Callable, Iterable, Tuple
+
+FENCE = "```"
+
+# A language tag after an opening fence, e.g. "javascript" or "ts"
+_LANG_TAG_RE = re.compile(r"[\w+#.-]*\s*")
+
+# First fenced block: optional language tag line, body up to the closing fence
+# (or the end of the text if the model never closed it)
+_FENCE_RE = re.compile(r"```(?:[\w+#.-]*[ \t]*\r?\n)?(.*?)(?:```|\Z)", re.DOTALL)
+
+
+@lru_cache(maxsize=512)
+def strip_fence(text: str) -> str:
+    """Return the code inside the first markdown fence, or the whole text"""
+    match = _FENCE_RE.search(text)
+    return (match.group(1) if match else text).strip()
+
+
+class FenceStripper:
+    """Strip markdown code fences from a response as it streams in.
+
+    Text before the first fence and after the closing fence is dropped, along
+    with the language tag on the opening fence. A response without any fence
+    is passed through whole. Output is held back only where it could still be
+    part of a closing fence or trailing whitespace.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._state = "prefix"  # prefix -> tag -> body -> done
+        self._started = False
+
+    def feed(self, chunk: str) -> str:
+        """Consume a chunk and return the cleaned code that is now final"""
+        if self._state == "done":
+            return ""
+        self._buffer += chunk
+
+        if self._state == "prefix":
+            start = self._buffer.find(FENCE)
+            if start < 0:
+                return ""
+            self._buffer = self._buffer[start + len(FENCE):]
+            self._state = "tag"
+
+        if self._state == "tag":
+            newline = self._buffer.find("\n")
+            if newline < 0:
+                if FENCE in self._buffer:
+                    self._state = "body"  # One-line fence: ```code```
+                return self._flush_body() if self._state == "body" else ""
+            if _LANG_TAG_RE.fullmatch(self._buffer[:newline]):
+                self._buffer = self._buffer[newline + 1:]
+            self._state = "body"
+
+        return self._flush_body()
+
+    def close(self) -> str:
+        """Return whatever is left once the stream has ended"""
+        if self._state == "done":
+            return ""
+        rest, self._buffer = self._buffer, ""
+        self._state = "done"
+        return self._emit(rest.rstrip())
+
+    def _flush_body(self) -> str:
+        end = self._buffer.find(FENCE)
+        if end >= 0:
+            body, self._buffer = self._buffer[:end], ""
+            self._state = "done"
+            return self._emit(body.rstrip())
+
+        # Anything trailing could still turn into the closing fence
+        ready = self._buffer.rstrip("` \t\r\n")
+        self._buffer = self._buffer[len(ready):]
+        return self._emit(ready)
+
+    def _emit(self, text: str) -> str:
+        if not self._started:
+            text = text.lstrip()
+            self._started = bool(text)
+        return text
+
+
+def stream_clean(chunks: Iterable[str], on_chunk: Callable[[str], None]) -> Tuple[str, str]:
+    """Feed streamed chunks through a FenceStripper, forwarding cleaned code.
+
+    Returns (raw_response, cleaned_code) once the stream is exhausted.
+    """
+    stripper = FenceStripper()
+    raw, cleaned = [], []
+    for chunk in chunks:
+        raw.append(chunk)
+        text = stripper.feed(chunk)
+        if text:
+            cleaned.append(text)
+            on_chunk(text)
+    text = stripper.close()
+    if text:
+        cleaned.append(text)
+        on_chunk(text)
+    return "".join(raw), "".join(cleaned)
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, field_validator
 from typing import Dict, List, Optional, Union, Literal, Any
 from enum import Enum
 
@@ -60,7 +60,8 @@ class StyleGuide(BaseModel):
     fonts: Dict[str, str]
     spacing: Optional[Dict[str, str]] = None
 
-    @validator("colors")
+    @field_validator("colors")
+    @classmethod
     def ensure_hex(cls, colors):
         for name, code in colors.items():
             if not code.startswith("#") and not code.startswith("rgba"):
@@ -1,20 +1,31 @@
 # agents/reflection_system.py
 # Step 4: Self-Reflection & Improvement
 
-from typing import Dict, List, Any, Optional, Tuple
+import logging
+import time
+from operator import attrgetter
+from typing import Dict, Iterator, List, Any, Optional, Tuple
 from dataclasses import dataclass
 from datetime import datetime, timedelta
-from enum import Enum
+from enum import IntEnum
+from collections import deque
 from .learning_system import LearningAgenticConverter, ConversionResult
 
-class ReflectionTrigger(Enum):
-    FAILURE_THRESHOLD = "failure_threshold"
-    PERIODIC = "periodic"
-    CONFIDENCE_DROP = "confidence_drop"
-    USER_FEEDBACK = "user_feedback"
-    PATTERN_MISMATCH = "pattern_mismatch"
+logger = logging.getLogger(__name__)
 
-@dataclass
+class ReflectionTrigger(IntEnum):
+    FAILURE_THRESHOLD = 1
+    PERIODIC = 2
+    CONFIDENCE_DROP = 3
+    USER_FEEDBACK = 4
+    PATTERN_MISMATCH = 5
+
+# Readable trigger names, only for log lines and API metadata
+_TRIGGER_NAMES = {trigger: trigger.name.lower() for trigger in ReflectionTrigger}
+
+_BY_PRIORITY = attrgetter("priority")
+
+@dataclass(slots=True, frozen=True)
 class ReflectionInsight:
     """Represents an insight gained from self-reflection"""
     insight_type: str
@@ -24,7 +35,7 @@ class ReflectionInsight:
     confidence: float
     priority: int  # 1-5, where 5 is highest priority
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class PerformanceMetrics:
     """Current performance metrics for reflection"""
     success_rate: float
@@ -36,18 +47,47 @@ class PerformanceMetrics:
     recent_failures: List[str]
     improvement_trend: str
 
+@dataclass(slots=True)
+class ReflectionRecord:
+    """One completed reflection, as kept in reflection_history"""
+    timestamp: float  # Epoch seconds; formatted only for the summary
+    trigger: int  # A ReflectionTrigger value
+    metrics: PerformanceMetrics
+    insights: List[ReflectionInsight]
+    actions_planned: int
+
 class SelfReflectionEngine:
     """Engine for agent self-reflection and improvement"""
+    REFLECTION_HISTORY_SIZE = 200
+    IMPROVEMENT_ACTIONS_SIZE = 500
     
     def __init__(self, converter):
         self.converter = converter
-        self.reflection_history = []
-        self.last_reflection = None
-        self.improvement_actions = []
+        # Bounded so a long-running agent keeps constant memory; the counters
+        # below let the summary avoid scanning them
+        self.reflection_history: deque = deque(maxlen=self.REFLECTION_HISTORY_SIZE)
+        self.last_reflection: Optional[ReflectionRecord] = None
+        self.improvement_actions: deque = deque(maxlen=self.IMPROVEMENT_ACTIONS_SIZE)
+        self.total_reflections = 0
+        self._planned_count = 0
+        self._completed_count = 0
+        # (conversion_count, result) of the last should_reflect() call
+        self._should_reflect_cache: Tuple[int, Tuple[bool, Optional[ReflectionTrigger]]] = (-1, (False, None))
         
     def should_reflect(self) -> Tuple[bool, Optional[ReflectionTrigger]]:
         """Determine if agent should perform self-reflection"""
-        
+        # Every input below only changes when a conversion is recorded
+        conversion_count = self.converter.conversion_count
+        cached_count, cached_result = self._should_reflect_cache
+        if cached_count == conversion_count:
+            return cached_result
+        
+        result = self._evaluate_reflection_triggers()
+        self._should_reflect_cache = (conversion_count, result)
+        return result
+    
+    def _evaluate_reflection_triggers(self) -> Tuple[bool, Optional[ReflectionTrigger]]:
+        """Run the reflection trigger checks, most urgent first"""
         # Check failure threshold
         recent_failures = self._count_recent_failures()
         if recent_failures >= 3:
@@ -59,7 +99,7 @@ class SelfReflectionEngine:
             return True, ReflectionTrigger.CONFIDENCE_DROP
         
         # Periodic reflection (every 50 conversions)
-        if len(self.converter.conversion_history) % 50 == 0 and len(self.converter.conversion_history) > 0:
+        if self.converter.conversion_count % 50 == 0 and self.converter.conversion_count > 0:
             return True, ReflectionTrigger.PERIODIC
         
         # Check user feedback
@@ -71,80 +111,86 @@ class SelfReflectionEngine:
     
     def perform_reflection(self, trigger: ReflectionTrigger) -> List[ReflectionInsight]:
         """Perform comprehensive self-reflection"""
-        print(f"🤔 Starting self-reflection triggered by: {trigger.value}")
+        logger.info("🤔 Starting self-reflection triggered by: %s", _TRIGGER_NAMES[trigger])
+        
+        # One clock read stamps the record and every action it plans
+        now = time.time()
         
         # Gather current performance metrics
         metrics = self._gather_performance_metrics()
         
-        # Analyze different aspects
+        # Analyze every aspect in one pass, counting high-priority insights as they come
         insights = []
-        insights.extend(self._reflect_on_strategy_effectiveness(metrics))
-        insights.extend(self._reflect_on_pattern_usage(metrics))
-        insights.extend(self._reflect_on_failure_patterns(metrics))
-        insights.extend(self._reflect_on_user_feedback(metrics))
-        insights.extend(self._reflect_on_learning_progress(metrics))
+        high_priority = 0
+        for insight in self._reflect_all(metrics):
+            insights.append(insight)
+            if insight.priority >= 4:
+                high_priority += 1
         
-        # Prioritize insights
-        insights.sort(key=lambda x: x.priority, reverse=True)
+        # Prioritize insights (stable, so equal priorities keep reflector order)
+        if len(insights) > 1:
+            insights.sort(key=_BY_PRIORITY, reverse=True)
         
         # Store reflection
-        reflection_record = {
-            "timestamp": datetime.now(),
-            "trigger": trigger.value,
-            "metrics": metrics,
-            "insights": insights,
-            "actions_planned": len([i for i in insights if i.priority >= 4])
-        }
+        reflection_record = ReflectionRecord(
+            timestamp=now,
+            trigger=int(trigger),
+            metrics=metrics,
+            insights=insights,
+            actions_planned=high_priority
+        )
         self.reflection_history.append(reflection_record)
+        self.total_reflections += 1
         self.last_reflection = reflection_record
         
         # Generate improvement actions
-        self._generate_improvement_actions(insights)
+        self._generate_improvement_actions(insights, now)
         
-        print(f"🎯 Generated {len(insights)} insights, {len([i for i in insights if i.priority >= 4])} high-priority")
+        logger.info("🎯 Generated %d insights, %d high-priority", len(insights), high_priority)
         return insights
     
     def _gather_performance_metrics(self) -> PerformanceMetrics:
         """Gather comprehensive performance metrics"""
-        history = self.converter.conversion_history
-        recent_history = history[-20:] if len(history) > 20 else history
+        # The history deque only holds the last HISTORY_SIZE (20) cases; copy it so
+        # a concurrent append can't break the iteration
+        recent_history = list(self.converter.conversion_history)
         
         if not recent_history:
             return PerformanceMetrics(0, 0, 0, 0, 0, {}, [], "insufficient_data")
         
-        # Basic metrics
-        success_rate = sum(1 for case in recent_history if case.success) / len(recent_history)
-        avg_confidence = sum(case.confidence for case in recent_history) / len(recent_history)
-        avg_execution_time = sum(case.execution_time for case in recent_history) / len(recent_history)
-        
-        # Pattern usage rate
-        pattern_conversions = sum(1 for case in recent_history 
-                                if hasattr(case, 'metadata') and case.metadata and 
-                                case.metadata.get('used_pattern'))
-        pattern_usage_rate = pattern_conversions / len(recent_history)
+        # One pass over the window for every metric; it is at most HISTORY_SIZE long
+        successes = 0
+        total_confidence = 0.0
+        total_execution_time = 0.0
+        pattern_conversions = 0
+        feedback_total = 0.0
+        feedback_count = 0
+        recent_failures = []
         
-        # User satisfaction (from feedback scores)
-        feedback_scores = [case.feedback_score for case in recent_history 
-                          if case.feedback_score is not None]
-        user_satisfaction = sum(feedback_scores) / len(feedback_scores) if feedback_scores else 0
-        
-        # Strategy effectiveness
-        strategy_effectiveness = {}
-        strategy_stats = {}
         for case in recent_history:
-            strategy = case.strategy_used
-            if strategy not in strategy_stats:
-                strategy_stats[strategy] = {"attempts": 0, "successes": 0}
-            strategy_stats[strategy]["attempts"] += 1
+            total_confidence += case.confidence
+            total_execution_time += case.execution_time
             if case.success:
-                strategy_stats[strategy]["successes"] += 1
+                successes += 1
+            else:
+                recent_failures.append(case.input_hash)
+            if case.used_pattern:
+                pattern_conversions += 1
+            if case.feedback_score is not None:
+                feedback_total += case.feedback_score
+                feedback_count += 1
+        
+        count = len(recent_history)
+        success_rate = successes / count
+        avg_confidence = total_confidence / count
+        avg_execution_time = total_execution_time / count
+        pattern_usage_rate = pattern_conversions / count
         
-        for strategy, stats in strategy_stats.items():
-            if stats["attempts"] > 0:
-                strategy_effectiveness[strategy] = stats["successes"] / stats["attempts"]
+        # User satisfaction (from feedback scores)
+        user_satisfaction = feedback_total / feedback_count if feedback_count else 0
         
-        # Recent failures
-        recent_failures = [case.input_hash for case in recent_history if not case.success]
+        # Strategy effectiveness, tallied incrementally as cases enter and leave the window
+        strategy_effectiveness = self.converter.recent_stats.strategy_effectiveness()
         
         # Improvement trend
         improvement_trend = "stable"  # Simplified for now
@@ -160,224 +206,221 @@ class SelfReflectionEngine:
             improvement_trend=improvement_trend
         )
     
-    def _reflect_on_strategy_effectiveness(self, metrics: PerformanceMetrics) -> List[ReflectionInsight]:
-        """Reflect on which strategies are working well"""
-        insights = []
-        
-        if not metrics.strategy_effectiveness:
-            return insights
-        
-        # Find best and worst performing strategies
-        best_strategy = max(metrics.strategy_effectiveness.items(), key=lambda x: x[1])
-        worst_strategy = min(metrics.strategy_effectiveness.items(), key=lambda x: x[1])
-        
-        # Insight about best strategy
-        if best_strategy[1] > 0.8:
-            insights.append(ReflectionInsight(
-                insight_type="strategy_success",
-                description=f"Strategy '{best_strategy[0]}' is highly effective ({best_strategy[1]:.1%} success rate)",
-                evidence=[f"Success rate: {best_strategy[1]:.1%}", "Consistently good results"],
-                suggested_action=f"Increase usage of {best_strategy[0]} strategy for similar contexts",
-                confidence=0.9,
-                priority=4
-            ))
-        
-        # Insight about worst strategy
-        if worst_strategy[1] < 0.5:
-            insights.append(ReflectionInsight(
-                insight_type="strategy_failure",
-                description=f"Strategy '{worst_strategy[0]}' is underperforming ({worst_strategy[1]:.1%} success rate)",
-                evidence=[f"Success rate: {worst_strategy[1]:.1%}", "Multiple recent failures"],
-                suggested_action=f"Revise decision criteria for {worst_strategy[0]} strategy or improve its implementation",
-                confidence=0.8,
-                priority=5
-            ))
-        
-        return insights
-    
-    def _reflect_on_pattern_usage(self, metrics: PerformanceMetrics) -> List[ReflectionInsight]:
-        """Reflect on pattern learning and usage"""
-        insights = []
-        
-        # Low pattern usage might indicate learning issues
+    def _reflect_all(self, metrics: PerformanceMetrics) -> Iterator[ReflectionInsight]:
+        """Yield insights on strategies, patterns, failures, feedback and learning in one pass"""
+        # Strategy effectiveness: best and worst in a single scan. Rates lie in
+        # [0, 1], so the sentinels are beaten by the first strategy, and strict
+        # comparisons keep the first of any ties as max()/min() did
+        best_name = worst_name = None
+        best_rate, worst_rate = -1.0, 2.0
+        for strategy, rate in metrics.strategy_effectiveness.items():
+            if rate > best_rate:
+                best_name, best_rate = strategy, rate
+            if rate < worst_rate:
+                worst_name, worst_rate = strategy, rate
+        
+        if best_name is not None:
+            # Insight about best strategy
+            if best_rate > 0.8:
+                yield ReflectionInsight(
+                    insight_type="strategy_success",
+                    description=f"Strategy '{best_name}' is highly effective ({best_rate:.1%} success rate)",
+                    evidence=[f"Success rate: {best_rate:.1%}", "Consistently good results"],
+                    suggested_action=f"Increase usage of {best_name} strategy for similar contexts",
+                    confidence=0.9,
+                    priority=4
+                )
+            
+            # Insight about worst strategy
+            if worst_rate < 0.5:
+                yield ReflectionInsight(
+                    insight_type="strategy_failure",
+                    description=f"Strategy '{worst_name}' is underperforming ({worst_rate:.1%} success rate)",
+                    evidence=[f"Success rate: {worst_rate:.1%}", "Multiple recent failures"],
+                    suggested_action=f"Revise decision criteria for {worst_name} strategy or improve its implementation",
+                    confidence=0.8,
+                    priority=5
+                )
+        
+        # Pattern usage: low usage might indicate learning issues
         if metrics.pattern_usage_rate < 0.2:
-            insights.append(ReflectionInsight(
+            yield ReflectionInsight(
                 insight_type="low_pattern_usage",
                 description=f"Low pattern usage rate ({metrics.pattern_usage_rate:.1%})",
                 evidence=["Few conversions using learned patterns", "Possible pattern matching issues"],
                 suggested_action="Improve pattern extraction and matching algorithms",
                 confidence=0.7,
                 priority=3
-            ))
-        
+            )
         # High pattern usage with good results
         elif metrics.pattern_usage_rate > 0.6 and metrics.success_rate > 0.8:
-            insights.append(ReflectionInsight(
+            yield ReflectionInsight(
                 insight_type="effective_pattern_learning",
                 description=f"High effective pattern usage ({metrics.pattern_usage_rate:.1%})",
                 evidence=["Frequent pattern usage", "Good success rate"],
                 suggested_action="Continue current pattern learning approach and expand pattern database",
                 confidence=0.9,
                 priority=2
-            ))
+            )
         
-        return insights
-    
-    def _reflect_on_failure_patterns(self, metrics: PerformanceMetrics) -> List[ReflectionInsight]:
-        """Analyze failure patterns to identify improvement areas"""
-        insights = []
-        
-        if len(metrics.recent_failures) >= 3:
-            insights.append(ReflectionInsight(
+        # Failure patterns
+        failure_count = len(metrics.recent_failures)
+        if failure_count >= 3:
+            yield ReflectionInsight(
                 insight_type="failure_pattern",
-                description=f"High failure rate detected: {len(metrics.recent_failures)} recent failures",
-                evidence=[f"{len(metrics.recent_failures)} recent failures", "Pattern analysis needed"],
+                description=f"High failure rate detected: {failure_count} recent failures",
+                evidence=[f"{failure_count} recent failures", "Pattern analysis needed"],
                 suggested_action="Analyze failure contexts and develop specialized handling",
                 confidence=0.8,
                 priority=5
-            ))
-        
-        return insights
-    
-    def _reflect_on_user_feedback(self, metrics: PerformanceMetrics) -> List[ReflectionInsight]:
-        """Reflect on user satisfaction and feedback"""
-        insights = []
+            )
         
-        if metrics.user_satisfaction < 3.0:  # On 1-5 scale
-            insights.append(ReflectionInsight(
+        # User satisfaction, on a 1-5 scale
+        if metrics.user_satisfaction < 3.0:
+            yield ReflectionInsight(
                 insight_type="low_user_satisfaction",
                 description=f"User satisfaction is low ({metrics.user_satisfaction:.1f}/5.0)",
                 evidence=["Low feedback scores", "User dissatisfaction"],
                 suggested_action="Analyze user feedback patterns and improve output quality",
                 confidence=0.9,
                 priority=5
-            ))
+            )
         elif metrics.user_satisfaction > 4.0:
-            insights.append(ReflectionInsight(
+            yield ReflectionInsight(
                 insight_type="high_user_satisfaction",
                 description=f"High user satisfaction ({metrics.user_satisfaction:.1f}/5.0)",
                 evidence=["Consistently good feedback", "User approval"],
                 suggested_action="Maintain current quality standards and identify what users appreciate most",
                 confidence=0.9,
                 priority=2
-            ))
-        
-        return insights
-    
-    def _reflect_on_learning_progress(self, metrics: PerformanceMetrics) -> List[ReflectionInsight]:
-        """Reflect on overall learning and improvement trends"""
-        insights = []
+            )
         
+        # Overall learning and improvement trend
         if metrics.improvement_trend == "declining":
-            insights.append(ReflectionInsight(
+            yield ReflectionInsight(
                 insight_type="declining_performance",
                 description="Performance is declining over time",
                 evidence=["Decreasing success rate", "Negative trend"],
                 suggested_action="Review recent changes and consider reverting problematic updates",
                 confidence=0.8,
                 priority=5
-            ))
+            )
         elif metrics.improvement_trend == "improving":
-            insights.append(ReflectionInsight(
+            yield ReflectionInsight(
                 insight_type="positive_learning",
                 description="Performance is improving over time",
                 evidence=["Increasing success rate", "Positive trend"],
                 suggested_action="Continue current learning approach and accelerate improvement",
                 confidence=0.9,
                 priority=3
-            ))
-        
-        return insights
+            )
     
-    def _generate_improvement_actions(self, insights: List[ReflectionInsight]):
+    def _generate_improvement_actions(self, insights: List[ReflectionInsight], now: float):
         """Generate concrete improvement actions from insights"""
         high_priority_insights = [i for i in insights if i.priority >= 4]
+        if not high_priority_insights:
+            return
         
         for insight in high_priority_insights:
             action = {
-                "timestamp": datetime.now(),
+                "timestamp": now,
                 "insight_type": insight.insight_type,
                 "action": insight.suggested_action,
                 "status": "planned",
                 "priority": insight.priority
             }
-            self.improvement_actions.append(action)
-            print(f"📋 Planned improvement action: {insight.suggested_action}")
+            self._append_action(action)
+        
+        # One log record for the whole batch rather than one write per action
+        logger.info("\n".join(f"📋 Planned improvement action: {insight.suggested_action}"
+                              for insight in high_priority_insights))
+    
+    def _append_action(self, action: Dict):
+        """Append an action, keeping the status counters in step with evictions"""
+        if len(self.improvement_actions) == self.improvement_actions.maxlen:
+            self._count_status(self.improvement_actions[0]["status"], -1)
+        self.improvement_actions.append(action)
+        self._count_status(action["status"], 1)
+    
+    def _count_status(self, status: str, delta: int):
+        if status == "planned":
+            self._planned_count += delta
+        elif status == "completed":
+            self._completed_count += delta
+    
+    def set_action_status(self, action: Dict, status: str):
+        """Change an improvement action's status, e.g. from planned to completed"""
+        self._count_status(action["status"], -1)
+        action["status"] = status
+        self._count_status(status, 1)
     
     def _count_recent_failures(self) -> int:
         """Count failures in recent conversions"""
-        recent = self.converter.conversion_history[-10:]
-        return sum(1 for case in recent if not case.success)
+        return self.converter.recent_stats.recent_failures
     
     def _analyze_confidence_trend(self) -> float:
         """Analyze confidence trend over recent conversions"""
-        if len(self.converter.conversion_history) < 20:
-            return 0
-        
-        recent = self.converter.conversion_history[-10:]
-        older = self.converter.conversion_history[-20:-10]
-        
-        recent_avg = sum(case.confidence for case in recent) / len(recent)
-        older_avg = sum(case.confidence for case in older) / len(older)
-        
-        return recent_avg - older_avg
+        return self.converter.recent_stats.confidence_trend
     
     def _check_negative_feedback(self) -> bool:
         """Check for recent negative user feedback"""
-        recent = self.converter.conversion_history[-10:]
-        negative_feedback = [case for case in recent 
-                           if case.feedback_score is not None and case.feedback_score < 3]
-        return len(negative_feedback) >= 2
+        return self.converter.recent_stats.recent_negative_feedback >= 2
     
     def get_reflection_summary(self) -> Dict:
         """Get summary of reflection activities"""
         return {
-            "total_reflections": len(self.reflection_history),
-            "last_reflection": self.last_reflection["timestamp"].isoformat() if self.last_reflection else None,
-            "pending_actions": len([a for a in self.improvement_actions if a["status"] == "planned"]),
-            "completed_actions": len([a for a in self.improvement_actions if a["status"] == "completed"]),
-            "recent_insights": len(self.last_reflection["insights"]) if self.last_reflection else 0
+            "total_reflections": self.total_reflections,
+            "last_reflection": datetime.fromtimestamp(self.last_reflection.timestamp).isoformat() if self.last_reflection else None,
+            "pending_actions": self._planned_count,
+            "completed_actions": self._completed_count,
+            "recent_insights": len(self.last_reflection.insights) if self.last_reflection else 0
         }
 
 class FullyAgenticConverter(LearningAgenticConverter):
     """Fully agentic converter with self-reflection and continuous improvement"""
+    REFLECTION_AUTONOMY_THRESHOLD = 0.7
     
     def __init__(self, llm, memory_db_path: str = "agent_memory.db"):
         super().__init__(llm, memory_db_path)
         self.reflection_engine = SelfReflectionEngine(self)
         self.autonomy_level = 0.8  # How autonomous the agent is (0-1)
-        print("✅ Fully agentic converter with self-reflection initialized")
+        logger.info("✅ Fully agentic converter with self-reflection initialized")
     
     def convert(self, input_code: str) -> ConversionResult:
         """Fully agentic conversion with self-reflection"""
+        # Reflection only runs above this autonomy level; below it skip the checks
+        if self.autonomy_level <= self.REFLECTION_AUTONOMY_THRESHOLD:
+            return super().convert(input_code)
         
         # Check if self-reflection is needed
         should_reflect, trigger = self.reflection_engine.should_reflect()
-        if should_reflect and self.autonomy_level > 0.7:
-            print("🤔 Agent is performing self-reflection...")
+        if should_reflect:
+            logger.info("🤔 Agent is performing self-reflection...")
             insights = self.reflection_engine.perform_reflection(trigger)
             
-            # Log insights for user visibility
-            for insight in insights[:3]:  # Show top 3 insights
-                print(f"💡 Insight: {insight.description}")
+            # Log the top 3 insights for user visibility, as one record
+            if insights:
+                logger.info("\n".join(f"💡 Insight: {insight.description}" for insight in insights[:3]))
         
         # Perform conversion
         result = super().convert(input_code)
         
-        # Add self-reflection metadata
-        result.metadata["reflection"] = {
-            "reflection_triggered": should_reflect,
-            "trigger": trigger.value if trigger else None,
-            "autonomy_level": self.autonomy_level,
-            "reflection_summary": self.reflection_engine.get_reflection_summary()
-        }
+        # Self-reflection metadata, only for conversions that reflected; the
+        # summary is always available from get_agent_status()
+        if should_reflect:
+            result.metadata["reflection"] = {
+                "reflection_triggered": True,
+                "trigger": _TRIGGER_NAMES[trigger],
+                "autonomy_level": self.autonomy_level,
+                "reflection_summary": self.reflection_engine.get_reflection_summary()
+            }
         
         return result
     
     def set_autonomy_level(self, level: float):
         """Set how autonomous the agent should be (0-1)"""
         self.autonomy_level = max(0, min(1, level))
-        print(f"🤖 Agent autonomy level set to {self.autonomy_level:.1%}")
+        logger.info("🤖 Agent autonomy level set to %.1f%%", self.autonomy_level * 100)
     
     def get_agent_status(self) -> Dict:
         """Get comprehensive agent status"""
@@ -390,35 +433,37 @@ class FullyAgenticConverter(LearningAgenticConverter):
             "autonomy_level": self.autonomy_level,
             "capabilities": base_stats["capabilities"] + ["self_reflection", "autonomous_improvement"],
             "reflection": reflection_summary,
-            "total_conversions": len(self.conversion_history)
+            "total_conversions": self.conversion_count
         }
     
     def trigger_manual_reflection(self) -> List[ReflectionInsight]:
         """Allow manual triggering of reflection"""
-        print("🤔 Manual reflection triggered by user")
+        logger.info("🤔 Manual reflection triggered by user")
         return self.reflection_engine.perform_reflection(ReflectionTrigger.PERIODIC)
 
 def setup_fully_agentic_pipeline(memory_db_path: str = "agent_memory.db", autonomy_level: float = 0.8):
     """Setup the fully agentic pipeline with all capabilities (Step 4)"""
     try:
-        from dotenv import load_dotenv
-        load_dotenv()
-        
-        from .dspy_implementation import GroqLLM
-        llm = GroqLLM()
+        from .agentic_core import configure_logging
+        from .dspy_implementation import get_llm
+        configure_logging()
+        llm = get_llm()
         
         converter = FullyAgenticConverter(llm, memory_db_path)
         converter.set_autonomy_level(autonomy_level)
         
-        print("🤖 Fully agentic converter initialized (Step 4: Self-reflection & autonomy)")
-        print("🧠 Capabilities: decision-making, planning, tool selection, adaptation, continuous learning, self-reflection")
-        print(f"⚡ Autonomy level: {autonomy_level:.1%}")
-        print("📚 Memory system: active")
-        print("🔧 Available tools:", len(converter.tool_selector.tools))
-        print("🤔 Self-reflection: enabled")
+        logger.info(
+            "🤖 Fully agentic converter initialized (Step 4: Self-reflection & autonomy)\n"
+            "🧠 Capabilities: decision-making, planning, tool selection, adaptation, continuous learning, self-reflection\n"
+            "⚡ Autonomy level: %.1f%%\n"
+            "📚 Memory system: active\n"
+            "🔧 Available tools: %d\n"
+            "🤔 Self-reflection: enabled",
+            autonomy_level * 100, len(converter.tool_selector.tools)
+        )
         
         return converter
         
     except Exception as e:
-        print(f"❌ Error setting up fully agentic pipeline: {e}")
+        logger.error("❌ Error setting up fully agentic pipeline: %s", e)
         raise e
\ No newline at end of file
@@ -0,0 +1,20 @@
+import os
+import tempfile
+
+from agents.learning_system import MemoryStore
+
+def test_memory_store_uses_wal():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = MemoryStore(os.path.join(tmp_dir, "agent_memory.db"))
+        try:
+            # Check the journal mode the database file actually ended up in
+            mode = store._conn.execute("PRAGMA journal_mode").fetchone()[0]
+            assert mode == "wal", f"Expected WAL journal mode, got {mode}"
+            synchronous = store._conn.execute("PRAGMA synchronous").fetchone()[0]
+            assert synchronous == 1, f"Expected synchronous=NORMAL (1), got {synchronous}"
+        finally:
+            store.close()
+    print("MemoryStore is using WAL journal mode!")
+
+if __name__ == "__main__":
+    test_memory_store_uses_wal()
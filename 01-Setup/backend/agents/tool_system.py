@@ -4,8 +4,71 @@
 from abc import ABC, abstractmethod
 from typing import Dict, List, Any, Optional
 from enum import Enum
+from dataclasses import dataclass
+from functools import lru_cache
+from operator import itemgetter
+import logging
 import re
-from .agentic_core import AgenticConverter, ConversionResult, ConversionStrategy
+from .agentic_core import AgenticConverter, ConversionContext, ConversionResult, ConversionStrategy
+
+logger = logging.getLogger(__name__)
+
+# Compiled once at import; every tool execute() reuses these
+_DESCRIBE_NAME_RE = re.compile(r"describe\(['\"]([^'\"]+)['\"]")
+_IT_NAME_RE = re.compile(r"it\(['\"]([^'\"]+)['\"]")
+_CY_CALL_RE = re.compile(r"cy\.(\w+)\(")
+_CY_COMMAND_RE = re.compile(r"cy\.(\w+)")
+_COMMAND_CHAIN_RE = re.compile(r"cy\.\w+\([^)]*\)\.\w+")
+
+# Cypress -> Playwright rewrites applied by the regex matcher, in order. Each
+# pattern starts with a literal; when it is absent the substitution is skipped
+_SUB_PATTERNS = [(literal, re.compile(pattern), replacement) for literal, pattern, replacement in (
+    ("cy.get(", r"cy\.get\(['\"]([^'\"]+)['\"]\)", r"page.locator('\1')"),
+    (".type(", r"\.type\(['\"]([^'\"]+)['\"]\)", r".fill('\1')"),
+    (".click()", r"\.click\(\)", r".click()"),
+    ("cy.visit(", r"cy\.visit\(['\"]([^'\"]+)['\"]\)", r"await page.goto('\1')"),
+    (".should(", r"\.should\(['\"]contain['\"]\s*,\s*['\"]([^'\"]+)['\"]\)",
+     r".toContainText('\1')")
+)]
+
+_BUILTIN_COMMANDS = frozenset(['get', 'type', 'click', 'should', 'visit'])
+
+_BY_SCORE = itemgetter(1)
+
+def _count_lines_with(code: str, needle: str, limit: int) -> int:
+    """Count lines containing needle, stopping once limit is reached"""
+    count = 0
+    index = code.find(needle)
+    while index >= 0 and count < limit:
+        count += 1
+        newline = code.find('\n', index)
+        if newline < 0:
+            break
+        index = code.find(needle, newline + 1)
+    return count
+
+@dataclass(frozen=True, slots=True)
+class _CodeFeatures:
+    """Counts and flags the tools' can_handle checks are based on"""
+    describe_count: int
+    nested_its: int
+    cypress_command_lines: int
+    has_intercepts: bool
+    has_custom_commands: bool
+    has_complex_chains: bool
+
+@lru_cache(maxsize=512)
+def _scan_features(code: str) -> _CodeFeatures:
+    """Scan code once for every tool; repeat snippets are served from the cache"""
+    return _CodeFeatures(
+        describe_count=code.count('describe('),
+        nested_its=code.count('  it('),  # Indented its
+        # Only the matcher's thresholds matter, so stop counting at 10
+        cypress_command_lines=_count_lines_with(code, 'cy.', 10),
+        has_intercepts='cy.intercept' in code,
+        has_custom_commands=any(cmd in code for cmd in ['cy.login', 'cy.custom']),
+        has_complex_chains='.should(' in code and '.and(' in code
+    )
 
 class ToolType(Enum):
     AST_PARSER = "ast_parser"
@@ -17,6 +80,12 @@ class ToolType(Enum):
 class Tool(ABC):
     """Base class for all agentic tools"""
     
+    __slots__ = ('_type_value',)
+    
+    def __init__(self):
+        # Plain attribute for the selector's loops, instead of property -> enum -> .value
+        self._type_value = self.tool_type.value
+    
     @abstractmethod
     def can_handle(self, code: str, context: Dict) -> float:
         """Returns confidence score (0-1) that this tool can handle the task"""
@@ -35,30 +104,31 @@ class Tool(ABC):
 class ASTParserTool(Tool):
     """Advanced AST parsing for complex code structures"""
     
+    __slots__ = ()
+    
     @property
     def tool_type(self) -> ToolType:
         return ToolType.AST_PARSER
     
     def can_handle(self, code: str, context: Dict) -> float:
         # Higher confidence for complex nested structures
-        describe_count = code.count('describe(')
-        nested_its = code.count('  it(')  # Indented its
+        features = _scan_features(code)
         
-        if describe_count > 2 or nested_its > 0:
+        if features.describe_count > 2 or features.nested_its > 0:
             return 0.9
-        elif describe_count > 0:
+        elif features.describe_count > 0:
             return 0.7
         else:
             return 0.3
     
     def execute(self, code: str, context: Dict) -> Dict:
         # Simulate AST parsing (in real implementation, call your parseAst.js)
+        commands = _CY_CALL_RE.findall(code) if 'cy.' in code else []
         structure = {
-            "describes": re.findall(r"describe\(['\"]([^'\"]+)['\"]", code),
-            "its": re.findall(r"it\(['\"]([^'\"]+)['\"]", code),
-            "commands": re.findall(r"cy\.(\w+)\(", code),
-            "custom_commands": [cmd for cmd in re.findall(r"cy\.(\w+)\(", code) 
-                               if cmd not in ['get', 'type', 'click', 'should', 'visit']]
+            "describes": _DESCRIBE_NAME_RE.findall(code),
+            "its": _IT_NAME_RE.findall(code),
+            "commands": commands,
+            "custom_commands": [cmd for cmd in commands if cmd not in _BUILTIN_COMMANDS]
         }
         
         return {
@@ -71,16 +141,18 @@ class ASTParserTool(Tool):
 class RegexMatcherTool(Tool):
     """Fast regex-based pattern matching for simple conversions"""
     
+    __slots__ = ()
+    
     @property
     def tool_type(self) -> ToolType:
         return ToolType.REGEX_MATCHER
     
     def can_handle(self, code: str, context: Dict) -> float:
         # Good for simple, linear code
-        lines = code.split('\n')
-        cypress_commands = sum(1 for line in lines if 'cy.' in line)
+        features = _scan_features(code)
+        cypress_commands = features.cypress_command_lines
         
-        if cypress_commands < 5 and 'describe(' not in code:
+        if cypress_commands < 5 and features.describe_count == 0:
             return 0.8
         elif cypress_commands < 10:
             return 0.6
@@ -91,50 +163,42 @@ class RegexMatcherTool(Tool):
         # Simple regex replacements
         converted = code
         
-        patterns = [
-            (r"cy\.get\(['\"]([^'\"]+)['\"]\)", r"page.locator('\1')"),
-            (r"\.type\(['\"]([^'\"]+)['\"]\)", r".fill('\1')"),
-            (r"\.click\(\)", r".click()"),
-            (r"cy\.visit\(['\"]([^'\"]+)['\"]\)", r"await page.goto('\1')"),
-            (r"\.should\(['\"]contain['\"]\s*,\s*['\"]([^'\"]+)['\"]\)", 
-             r".toContainText('\1')")
-        ]
-        
-        for pattern, replacement in patterns:
-            converted = re.sub(pattern, replacement, converted)
+        for literal, pattern, replacement in _SUB_PATTERNS:
+            if literal in converted:
+                converted = pattern.sub(replacement, converted)
         
         return {
             "success": True,
             "converted_code": converted,
-            "patterns_applied": len(patterns),
+            "patterns_applied": len(_SUB_PATTERNS),
             "tool_used": "REGEX_MATCHER"
         }
 
 class PatternAnalyzerTool(Tool):
     """Analyzes complex patterns and suggests best conversion approach"""
     
+    __slots__ = ()
+    
     @property
     def tool_type(self) -> ToolType:
         return ToolType.PATTERN_ANALYZER
     
     def can_handle(self, code: str, context: Dict) -> float:
         # Good for code with mixed patterns
-        has_intercepts = 'cy.intercept' in code
-        has_custom_commands = any(cmd in code for cmd in ['cy.login', 'cy.custom'])
-        has_complex_chains = '.should(' in code and '.and(' in code
+        features = _scan_features(code)
         
-        if has_intercepts or has_custom_commands or has_complex_chains:
+        if features.has_intercepts or features.has_custom_commands or features.has_complex_chains:
             return 0.9
         else:
             return 0.4
     
     def execute(self, code: str, context: Dict) -> Dict:
         patterns = {
-            "api_intercepts": len(re.findall(r'cy\.intercept', code)),
-            "command_chains": len(re.findall(r'cy\.\w+\([^)]*\)\.\w+', code)),
-            "custom_commands": len([cmd for cmd in re.findall(r'cy\.(\w+)', code)
-                                 if cmd not in ['get', 'type', 'click', 'should', 'visit']]),
-            "assertions": len(re.findall(r'\.should\(', code))
+            "api_intercepts": code.count('cy.intercept'),
+            "command_chains": len(_COMMAND_CHAIN_RE.findall(code)),
+            "custom_commands": len([cmd for cmd in _CY_COMMAND_RE.findall(code)
+                                 if cmd not in _BUILTIN_COMMANDS]),
+            "assertions": code.count('.should(')
         }
         
         # Suggest conversion strategy based on patterns
@@ -157,6 +221,8 @@ class PatternAnalyzerTool(Tool):
 class SyntaxValidatorTool(Tool):
     """Validates converted code syntax"""
     
+    __slots__ = ()
+    
     @property
     def tool_type(self) -> ToolType:
         return ToolType.SYNTAX_VALIDATOR
@@ -199,25 +265,30 @@ class AgenticToolSelector:
             SyntaxValidatorTool()
         ]
         self.tool_performance = {}  # Track which tools work best for what
+        self._total_attempts = 0  # Sum of every tool_performance "attempts"
+        self._validator = next((t for t in self.tools if t.tool_type == ToolType.SYNTAX_VALIDATOR), None)
     
     def select_tools(self, code: str, context: Dict) -> List[Tool]:
         """Agent decides which tools to use and in what order"""
         
         tool_scores = []
+        # Same complexity for every tool, so format the key suffix once
+        key_suffix = f"_{context.get('complexity', 'unknown')}"
+        performance = self.tool_performance
         for tool in self.tools:
             confidence = tool.can_handle(code, context)
             
             # Factor in historical performance
-            tool_key = f"{tool.tool_type.value}_{context.get('complexity', 'unknown')}"
-            historical_success = self.tool_performance.get(tool_key, {}).get('success_rate', 0.5)
+            perf = performance.get(tool._type_value + key_suffix)
+            historical_success = perf['success_rate'] if perf else 0.5
             
             # Weighted score
             final_score = confidence * 0.7 + historical_success * 0.3
             
             tool_scores.append((tool, final_score))
         
-        # Sort by score and select top tools
-        tool_scores.sort(key=lambda x: x[1], reverse=True)
+        # Sort by score and select top tools (list.sort beats heapq.nlargest at 4 tools)
+        tool_scores.sort(key=_BY_SCORE, reverse=True)
         
         # Agent's decision logic for tool selection
         selected_tools = []
@@ -228,17 +299,18 @@ class AgenticToolSelector:
         
         # Add complementary tools
         for tool, score in tool_scores[1:]:
-            if score > 0.6 and tool.tool_type != selected_tools[0].tool_type:
+            if score > 0.6 and tool._type_value != selected_tools[0]._type_value:
                 selected_tools.append(tool)
                 if len(selected_tools) >= 3:  # Max 3 tools
                     break
         
         # Always validate at the end
-        validator = next((t for t in self.tools if t.tool_type == ToolType.SYNTAX_VALIDATOR), None)
+        validator = self._validator
         if validator and validator not in selected_tools:
             selected_tools.append(validator)
         
-        print(f"🔧 Agent selected {len(selected_tools)} tools: {[t.tool_type.value for t in selected_tools]}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("🔧 Agent selected %d tools: %s", len(selected_tools), [t._type_value for t in selected_tools])
         return selected_tools
     
     def execute_tools(self, code: str, context: Dict) -> Dict:
@@ -247,14 +319,17 @@ class AgenticToolSelector:
         selected_tools = self.select_tools(code, context)
         results = []
         current_code = code
+        overall_success = True
         
         for i, tool in enumerate(selected_tools):
-            print(f"🔄 Executing tool {i+1}/{len(selected_tools)}: {tool.tool_type.value}")
+            logger.debug("🔄 Executing tool %d/%d: %s", i + 1, len(selected_tools), tool._type_value)
             
             try:
                 result = tool.execute(current_code, context)
-                result['tool_type'] = tool.tool_type.value
+                result['tool_type'] = tool._type_value
                 results.append(result)
+                if not result.get('success', False):
+                    overall_success = False
                 
                 # Update code for next tool if this tool generated new code
                 if 'converted_code' in result:
@@ -264,34 +339,36 @@ class AgenticToolSelector:
                 self._update_tool_performance(tool, context, result['success'])
                 
             except Exception as e:
-                print(f"❌ Tool {tool.tool_type.value} failed: {e}")
+                logger.warning("❌ Tool %s failed: %s", tool._type_value, e)
                 results.append({
                     "success": False,
                     "error": str(e),
-                    "tool_type": tool.tool_type.value
+                    "tool_type": tool._type_value
                 })
+                overall_success = False
         
         return {
             "final_code": current_code,
             "tool_results": results,
             "tools_used": len(selected_tools),
-            "overall_success": all(r.get('success', False) for r in results)
+            "overall_success": overall_success
         }
     
     def _update_tool_performance(self, tool: Tool, context: Dict, success: bool):
         """Track tool performance for future decision making"""
         
-        tool_key = f"{tool.tool_type.value}_{context.get('complexity', 'unknown')}"
+        tool_key = f"{tool._type_value}_{context.get('complexity', 'unknown')}"
         
-        if tool_key not in self.tool_performance:
-            self.tool_performance[tool_key] = {
+        perf = self.tool_performance.get(tool_key)
+        if perf is None:
+            perf = self.tool_performance[tool_key] = {
                 "attempts": 0,
                 "successes": 0,
                 "success_rate": 0.5
             }
         
-        perf = self.tool_performance[tool_key]
         perf["attempts"] += 1
+        self._total_attempts += 1
         if success:
             perf["successes"] += 1
         
@@ -302,7 +379,7 @@ class AgenticToolSelector:
         return {
             "available_tools": len(self.tools),
             "tool_performance": self.tool_performance,
-            "total_executions": sum(p["attempts"] for p in self.tool_performance.values())
+            "total_executions": self._total_attempts
         }
 
 class EnhancedAgenticConverter(AgenticConverter):
@@ -311,26 +388,27 @@ class EnhancedAgenticConverter(AgenticConverter):
     def __init__(self, llm):
         super().__init__(llm)
         self.tool_selector = AgenticToolSelector()
-        print("✅ Enhanced agentic converter with tool selection initialized")
+        logger.info("✅ Enhanced agentic converter with tool selection initialized")
     
     def convert(self, input_code: str) -> ConversionResult:
         """Enhanced conversion with tool selection"""
-        print("🤖 Starting enhanced agentic conversion with tool selection...")
+        logger.info("🤖 Starting enhanced agentic conversion with tool selection...")
         
         # Analyze code
         context = self._analyze_code(input_code)
         
         # Agent selects and executes tools
-        tool_results = self.tool_selector.execute_tools(input_code, context.__dict__)
+        tool_results = self.tool_selector.execute_tools(input_code, context.as_dict())
         
         # Use tool insights to inform LLM conversion
         enhanced_context = {
-            **context.__dict__,
+            **context.as_dict(),
             "tool_insights": tool_results
         }
         
         # Proceed with enhanced conversion using tool insights
-        strategy = self._decide_strategy_with_tools(enhanced_context)
+        strategy = self._decide_strategy_with_tools(context, enhanced_context)
+        context.strategy = strategy
         plan = self._create_conversion_plan(context, strategy)
         result = self._execute_plan(input_code, plan, context)
         
@@ -341,7 +419,7 @@ class EnhancedAgenticConverter(AgenticConverter):
         
         return result
     
-    def _decide_strategy_with_tools(self, enhanced_context: Dict) -> ConversionStrategy:
+    def _decide_strategy_with_tools(self, context: ConversionContext, enhanced_context: Dict) -> ConversionStrategy:
         """Make strategy decisions informed by tool analysis"""
         
         tool_insights = enhanced_context.get("tool_insights", {})
@@ -356,7 +434,7 @@ class EnhancedAgenticConverter(AgenticConverter):
                     return ConversionStrategy.CUSTOM_COMMANDS
         
         # Fall back to original logic
-        return super()._decide_strategy(enhanced_context)
+        return self._decide_strategy(context)
     
     def get_agent_status(self) -> Dict:
         """Get comprehensive agent status"""
@@ -374,18 +452,17 @@ class EnhancedAgenticConverter(AgenticConverter):
 def setup_enhanced_agentic_pipeline():
     """Setup the enhanced agentic pipeline with tool selection (Step 2)"""
     try:
-        from dotenv import load_dotenv
-        load_dotenv()
-        
-        from .dspy_implementation import GroqLLM
-        llm = GroqLLM()
+        from .agentic_core import configure_logging
+        from .dspy_implementation import get_llm
+        configure_logging()
+        llm = get_llm()
         
         converter = EnhancedAgenticConverter(llm)
-        print("🤖 Enhanced agentic converter initialized (Step 2: Tool selection)")
-        print("🔧 Available tools:", len(converter.tool_selector.tools))
+        logger.info("🤖 Enhanced agentic converter initialized (Step 2: Tool selection)")
+        logger.info("🔧 Available tools: %d", len(converter.tool_selector.tools))
         
         return converter
         
     except Exception as e:
-        print(f"❌ Error setting up enhanced agentic pipeline: {e}")
+        logger.error("❌ Error setting up enhanced agentic pipeline: %s", e)
         raise e
\ No newline at end of file
@@ -2,18 +2,38 @@
 # Writes the transformed Playwright code to output directory
 
 import os
+from concurrent.futures import ThreadPoolExecutor
+
+WRITE_BUFFER_SIZE = 1 << 16
+MAX_WRITE_WORKERS = 32
+
+def _write_one(out_file, playwright_code):
+    try:
+        with open(out_file, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as f:
+            f.write(playwright_code)
+        return None
+    except Exception as e:
+        return e
 
 def write_playwright_files(transformed_chunks, output_dir):
     os.makedirs(output_dir, exist_ok=True)
 
+    # Later chunks win on a repeated filename, as they did when written in order
+    files = {}
     for chunk in transformed_chunks:
         filename = chunk['filename'].replace('.cy', '')  # Remove .cy if present
         out_file = os.path.join(output_dir, filename)
-        playwright_code = chunk.get('playwright_code', '// No code generated')
+        files.pop(out_file, None)
+        files[out_file] = chunk.get('playwright_code', '// No code generated')
+
+    if not files:
+        return
 
-        try:
-            with open(out_file, 'w') as f:
-                f.write(playwright_code)
-            print(f"✅ Generated: {out_file}")
-        except Exception as e:
-            print(f"❌ Error writing {out_file}: {e}")
\ No newline at end of file
+    # Writes are independent, so overlap them; results are reported in order
+    with ThreadPoolExecutor(max_workers=min(MAX_WRITE_WORKERS, len(files))) as executor:
+        errors = executor.map(_write_one, files.keys(), files.values())
+        for out_file, error in zip(files, errors):
+            if error is None:
+                print(f"✅ Generated: {out_file}")
+            else:
+                print(f"❌ Error writing {out_file}: {error}")
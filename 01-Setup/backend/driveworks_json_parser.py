@@ -1,5 +1,5 @@
 import xml.etree.ElementTree as ET
-import json
+import orjson
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -23,117 +23,116 @@ def extract_common_attributes(control):
             position = {"x": 0, "y": 0}
     return props, {}, position
 
-def parse_label(control):
-    name = control.attrib.get("Name", "UnnamedLabel")
-    text = control.attrib.get("Text", "")
-    font_size = control.attrib.get("FontSize", "")
-    font_color = control.attrib.get("FontColor", "")
-    font_weight = control.attrib.get("FontWeight", "")
-    props, _, position = extract_common_attributes(control)
-    return {
-        "name": name,
-        "type": "component",
-        "componentName": "Label",
-        "reusable": True,
-        "styles": "mb-2 font-bold text-gray-700",
-        "props": {**props, "text": text, "fontSize": font_size, "color": font_color, "fontWeight": font_weight},
-        "position": position,
-        "alignment": infer_alignment(position.get("x", 0))
-    }
-
-def parse_combobox(control):
-    name = control.attrib.get("Name", "UnnamedComboBox")
+def combobox_options(control):
     options = [child.attrib.get("Text") for child in control.findall("Option")]
-    props, _, position = extract_common_attributes(control)
-    return {
-        "name": name,
-        "type": "component",
-        "componentName": "Dropdown",
-        "reusable": True,
-        "styles": "w-full border border-gray-300 rounded mb-4",
-        "props": {**props, "options": options or ["Option1", "Option2"]},
-        "position": position,
-        "alignment": infer_alignment(position.get("x", 0))
-    }
+    return {"options": options or ["Option1", "Option2"]}
 
-def parse_textbox(control):
-    name = control.attrib.get("Name", "UnnamedTextBox")
-    placeholder = control.attrib.get("Placeholder", "")
-    props, _, position = extract_common_attributes(control)
-    return {
-        "name": name,
-        "type": "component",
-        "componentName": "TextBox",
-        "reusable": True,
+# Per-control differences: default name, output component, styles, the
+# (attribute, prop, default) triples to pluck, and any computed props
+COMPONENT_SPECS = {
+    "Label": {
+        "default_name": "UnnamedLabel",
+        "component": "Label",
+        "styles": "mb-2 font-bold text-gray-700",
+        "attrs": (("Text", "text", ""), ("FontSize", "fontSize", ""),
+                  ("FontColor", "color", ""), ("FontWeight", "fontWeight", "")),
+    },
+    "ComboBox": {
+        "default_name": "UnnamedComboBox",
+        "component": "Dropdown",
         "styles": "w-full border border-gray-300 rounded mb-4",
-        "props": {**props, "placeholder": placeholder},
-        "position": position,
-        "alignment": infer_alignment(position.get("x", 0))
-    }
-
-def parse_slider(control):
-    name = control.attrib.get("Name", "UnnamedSlider")
-    min_val = control.attrib.get("Min", "0")
-    max_val = control.attrib.get("Max", "100")
-    step = control.attrib.get("Step", "1")
-    props, _, position = extract_common_attributes(control)
-    return {
-        "name": name,
-        "type": "component",
-        "componentName": "Slider",
-        "reusable": True,
+        "attrs": (),
+        "extra_props": combobox_options,
+    },
+    "TextBox": {
+        "default_name": "UnnamedTextBox",
+        "component": "TextBox",
+        "styles": "w-full border border-gray-300 rounded mb-4",
+        "attrs": (("Placeholder", "placeholder", ""),),
+    },
+    "Slider": {
+        "default_name": "UnnamedSlider",
+        "component": "Slider",
         "styles": "w-full",
-        "props": {**props, "min": min_val, "max": max_val, "step": step},
-        "position": position,
-        "alignment": infer_alignment(position.get("x", 0))
-    }
+        "attrs": (("Min", "min", "0"), ("Max", "max", "100"), ("Step", "step", "1")),
+    },
+    "Button": {
+        "default_name": "UnnamedButton",
+        "component": "Button",
+        "styles": "bg-green-500 text-white px-4 py-2 rounded hover:bg-green-700",
+        "attrs": (("Text", "text", "Submit"),),
+    },
+}
 
-def parse_button(control):
-    name = control.attrib.get("Name", "UnnamedButton")
-    text = control.attrib.get("Text", "Submit")
+def parse_control(control, spec):
+    attrib = control.attrib
     props, _, position = extract_common_attributes(control)
+    for attr, prop, default in spec["attrs"]:
+        props[prop] = attrib.get(attr, default)
+    extra_props = spec.get("extra_props")
+    if extra_props:
+        props.update(extra_props(control))
     return {
-        "name": name,
+        "name": attrib.get("Name", spec["default_name"]),
         "type": "component",
-        "componentName": "Button",
+        "componentName": spec["component"],
         "reusable": True,
-        "styles": "bg-green-500 text-white px-4 py-2 rounded hover:bg-green-700",
-        "props": {**props, "text": text},
+        "styles": spec["styles"],
+        "props": props,
         "position": position,
         "alignment": infer_alignment(position.get("x", 0))
     }
 
 def infer_alignment(x):
-    try:
-        x_val = int(x)
-        if x_val < 400:
-            return "left"
-        elif x_val < 800:
-            return "center"
-        else:
-            return "right"
-    except:
+    # x is already an int: extract_common_attributes parses it, 0 when absent or
+    # malformed. Controls stream in one at a time from iter_controls, so there is
+    # never a batch of positions to hand to numpy; two compares per control is it
+    if x < 400:
         return "left"
+    elif x < 800:
+        return "center"
+    else:
+        return "right"
+
+FEED_CHUNK_SIZE = 64 * 1024
+
+def iter_controls(xml_str):
+    """Yield each top-level control once it is fully parsed, then drop it from the tree"""
+    parser = ET.XMLPullParser(events=("start", "end"))
+    root = None
+    depth = 0
+
+    def feed(data):
+        nonlocal root, depth
+        parser.feed(data)
+        for event, element in parser.read_events():
+            if event == "start":
+                if root is None:
+                    root = element
+                depth += 1
+                continue
+            depth -= 1
+            if depth == 1:
+                yield element
+                root.clear()
+
+    # Feed in chunks so only the controls still being parsed are held in memory
+    yield from feed("<root>")
+    for start in range(0, len(xml_str), FEED_CHUNK_SIZE):
+        yield from feed(xml_str[start:start + FEED_CHUNK_SIZE])
+    yield from feed("</root>")
+    parser.close()
 
 def parse_driveworks_form(xml_str):
     try:
         logger.info("Parsing DriveWorks form")
-        root = ET.fromstring(f"<root>{xml_str}</root>")
         components = []
-        for control in root:
-            tag = control.tag.split("}")[-1]
-            if tag == "Label":
-                components.append(parse_label(control))
-            elif tag == "ComboBox":
-                components.append(parse_combobox(control))
-            elif tag == "TextBox":
-                components.append(parse_textbox(control))
-            elif tag == "Slider":
-                components.append(parse_slider(control))
-            elif tag == "Button":
-                components.append(parse_button(control))
+        for control in iter_controls(xml_str):
+            spec = COMPONENT_SPECS.get(control.tag.rpartition("}")[2])
+            if spec:
+                components.append(parse_control(control, spec))
 
-        return json.dumps({"children": [{"children": components}]}, indent=2)
+        return orjson.dumps({"children": [{"children": components}]}, option=orjson.OPT_INDENT_2).decode()
     except Exception as e:
         logger.error(f"Error parsing form: {str(e)}")
-        return json.dumps({"children": []})
+        return orjson.dumps({"children": []}).decode()
@@ -5,32 +5,37 @@ const fs = require('fs');
 const parser = require('@babel/parser');
 const traverse = require('@babel/traverse').default;
 
-const filePath = process.argv[2];
-const sourceCode = fs.readFileSync(filePath, 'utf8');
-
-const ast = parser.parse(sourceCode, {
-  sourceType: 'module',
-  plugins: ['jsx', 'typescript']
-});
-
-const customCommands = [];
-
-traverse(ast, {
-  CallExpression(path) {
-    const callee = path.node.callee;
-    if (
-      callee.type === 'MemberExpression' &&
-      callee.object.name === 'Cypress' &&
-      callee.property.name === 'Commands'
-    ) {
-      customCommands.push(path.toString());
+function parseFile(filePath) {
+  const sourceCode = fs.readFileSync(filePath, 'utf8');
+
+  const ast = parser.parse(sourceCode, {
+    sourceType: 'module',
+    plugins: ['jsx', 'typescript']
+  });
+
+  const customCommands = [];
+
+  traverse(ast, {
+    CallExpression(path) {
+      const callee = path.node.callee;
+      if (
+        callee.type === 'MemberExpression' &&
+        callee.object.name === 'Cypress' &&
+        callee.property.name === 'Commands'
+      ) {
+        customCommands.push(path.toString());
+      }
     }
-  }
-});
+  });
+
+  return {
+    ast: ast.program.body,
+    customCommands
+  };
+}
 
-const output = {
-  ast: ast.program.body,
-  customCommands
-};
+module.exports = { parseFile };
 
-console.log(JSON.stringify(output));
+if (require.main === module) {
+  console.log(JSON.stringify(parseFile(process.argv[2])));
+}
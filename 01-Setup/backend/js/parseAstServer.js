@@ -0,0 +1,18 @@
+// js/parseAstServer.js
+// Long-lived parser: reads one file path per line on stdin and writes one JSON
+// result per line on stdout, so Node starts once per run instead of per file
+
+const readline = require('readline');
+const { parseFile } = require('./parseAst');
+
+const input = readline.createInterface({ input: process.stdin, terminal: false });
+
+input.on('line', (filePath) => {
+  let output;
+  try {
+    output = parseFile(filePath);
+  } catch (err) {
+    output = { error: String(err && err.message || err) };
+  }
+  process.stdout.write(JSON.stringify(output) + '\n');
+});
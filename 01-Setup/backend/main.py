@@ -1,17 +1,22 @@
 from fastapi import FastAPI, HTTPException, Depends, Request
-from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, ORJSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 from agents.pydantic_models import (
     ConversionRequest, ConversionResponse,
     ComponentResult, ValidationResult, ValidationIssue, ValidationFix
 )
-from agents.dspy_implementation import setup_dspy_pipeline
 
+import asyncio
+import hashlib
 import logging
+import threading
+import orjson
 import traceback
 import time
-import json
+import os
+from functools import lru_cache
 from typing import Dict, Any, List
 
 # ────────────────────────────────────────────────────────────────
@@ -20,7 +25,8 @@ from typing import Dict, Any, List
 app = FastAPI(
     title="AI Code Transformation Agent",
     description="A DSPy-powered agent for converting source code to target framework using planner/executor/validator/regrouper",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 app.add_middleware(
@@ -35,15 +41,23 @@ app.add_middleware(
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("agent-api")
 
+STREAM_BATCH_MAX = 64  # Queued chunks merged into one streamed write
+
 # ────────────────────────────────────────────────────────────────
 # DSPy Pipeline Setup
 # ────────────────────────────────────────────────────────────────
+# Built (and groq imported) on the first request that needs it, so the server
+# starts listening and /health answers without waiting on it
 pipeline = None
+_pipeline_lock = threading.Lock()
 
 def get_pipeline():
     global pipeline
     if pipeline is None:
-        pipeline = setup_dspy_pipeline()
+        with _pipeline_lock:
+            if pipeline is None:
+                from agents.dspy_implementation import setup_dspy_pipeline
+                pipeline = setup_dspy_pipeline()
     return pipeline
 
 # ────────────────────────────────────────────────────────────────
@@ -57,6 +71,31 @@ async def global_exception_handler(request: Request, exc: Exception):
         content={"detail": str(exc)}
     )
 
+# ────────────────────────────────────────────────────────────────
+# Single-flight: identical concurrent inputs share one pipeline run
+# ────────────────────────────────────────────────────────────────
+_inflight: Dict[str, asyncio.Task] = {}
+
+def _finish_inflight(key: str, task: asyncio.Task):
+    _inflight.pop(key, None)
+    # If every waiter disconnected, nobody awaits the task; retrieving the
+    # exception here keeps asyncio from logging "never retrieved" for it
+    if not task.cancelled():
+        task.exception()
+
+async def run_pipeline_once(pipeline, input_code: str):
+    key = hashlib.sha256(input_code.encode()).hexdigest()
+    task = _inflight.get(key)
+    if task is None:
+        # The pipeline blocks on Groq; run it off the event loop
+        task = asyncio.ensure_future(run_in_threadpool(pipeline, input_code))
+        _inflight[key] = task
+        task.add_done_callback(lambda done: _finish_inflight(key, done))
+    else:
+        logger.info("⏳ Joining in-flight conversion of identical input")
+    # Shielded so one client disconnecting doesn't cancel the run for the others
+    return await asyncio.shield(task)
+
 # ────────────────────────────────────────────────────────────────
 # Convert Endpoint
 # ────────────────────────────────────────────────────────────────
@@ -74,7 +113,7 @@ async def convert_code(
         start = time.time()
         logger.info("Starting conversion pipeline...")
 
-        result = pipeline(request.input_code)
+        result = await run_pipeline_once(pipeline, request.input_code)
 
         # Format results
         formatted_components = []
@@ -104,31 +143,107 @@ async def convert_code(
         duration = time.time() - start
         logger.info(f"✅ Conversion completed in {duration:.2f}s")
 
-        return ConversionResponse(
+        # Components were validated as they were built above
+        return ConversionResponse.model_construct(
+            success=result.get("success", True),
             converted_code=result.get("converted_code", "// No code generated"),
             components=formatted_components,
-            metadata={"duration_seconds": duration}
+            metadata={
+                **result.get("metadata", {}),
+                "confidence": result.get("confidence"),
+                "strategy_used": result.get("strategy_used"),
+                "duration_seconds": duration
+            }
         )
 
     except Exception as e:
         logger.error(f"Conversion failed: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post(
+    "/convert/stream",
+    summary="Convert source code, streaming the converted code as it is generated",
+    response_class=StreamingResponse
+)
+async def convert_code_stream(
+    request: ConversionRequest,
+    pipeline = Depends(get_pipeline)
+):
+    loop = asyncio.get_running_loop()
+    chunks: asyncio.Queue = asyncio.Queue()
+    streamed = False
+
+    def on_chunk(text: str):
+        # Called from the pipeline's worker thread
+        nonlocal streamed
+        streamed = True
+        loop.call_soon_threadsafe(chunks.put_nowait, text)
+
+    async def run_pipeline():
+        try:
+            # Not routed through run_pipeline_once: chunks go to this caller's
+            # on_chunk, so a second client could not join the run mid-stream
+            result = await run_in_threadpool(pipeline, request.input_code, on_chunk)
+            # Error and cached paths can return without streaming anything, and
+            # a stream that failed part-way still needs its error appended
+            if not streamed:
+                await chunks.put(result.get("converted_code", "// No code generated"))
+            elif result.get("success") is False:
+                await chunks.put(f"\n{result.get('converted_code', '')}")
+        except Exception as e:
+            logger.error(f"Streaming conversion failed: {str(e)}", exc_info=True)
+            await chunks.put(f"\n// Error during conversion: {str(e)}")
+        finally:
+            await chunks.put(None)
+
+    async def stream():
+        task = asyncio.create_task(run_pipeline())
+        try:
+            done = False
+            while not done:
+                # Coalesce whatever queued up while the last write went out
+                # into one body chunk, rather than one write per token
+                batch = [await chunks.get()]
+                while not chunks.empty() and len(batch) < STREAM_BATCH_MAX:
+                    batch.append(chunks.get_nowait())
+                if batch[-1] is None:
+                    batch.pop()
+                    done = True
+                if batch:
+                    yield "".join(batch)
+        finally:
+            await task
+
+    return StreamingResponse(stream(), media_type="text/plain")
+
 # ────────────────────────────────────────────────────────────────
 # UI Mapping (optional preview/debug)
 # ────────────────────────────────────────────────────────────────
-@app.get("/ui-mapping", response_model=Dict[str, Any])
-async def get_ui_mapping():
-    try:
-        with open("ui_mapping.json", "r") as f:
-            return json.load(f)
-    except FileNotFoundError:
+UI_MAPPING_PATH = "ui_mapping.json"
+
+@lru_cache(maxsize=1)
+def _load_ui_mapping(mtime):
+    # Keyed on mtime so an edited file is picked up without a restart
+    if mtime is None:
         return {
             "color_map": {},
             "fonts": {},
             "alignment": {},
             "slider": {}
         }
+    with open(UI_MAPPING_PATH, "rb") as f:
+        return orjson.loads(f.read())
+
+def load_ui_mapping():
+    try:
+        mtime = os.path.getmtime(UI_MAPPING_PATH)
+    except FileNotFoundError:
+        mtime = None
+    return _load_ui_mapping(mtime)
+
+@app.get("/ui-mapping", response_model=Dict[str, Any])
+async def get_ui_mapping():
+    return load_ui_mapping()
 
 # ────────────────────────────────────────────────────────────────
 # Health Check
@@ -137,7 +252,9 @@ async def get_ui_mapping():
 async def health_check():
     return {
         "status": "healthy",
-        "pipeline": "initialized"
+        # Built on the first request that needs it, so absent until then or
+        # if building it failed
+        "pipeline": "initialized" if pipeline is not None else "not_initialized"
     }
 
 # ────────────────────────────────────────────────────────────────
@@ -167,51 +284,3 @@ async def provide_feedback(
         return {"status": "feedback_received"}
     
     return {"status": "feedback_not_supported"}
-
-@app.post("/convert")
-async def convert_code(request: ConversionRequest, pipeline = Depends(get_pipeline)):
-    try:
-        start = time.time()
-        logger.info("Starting agentic conversion pipeline...")
-
-        result = pipeline(request.input_code)
-
-        # Enhanced response with agent metadata
-        response_data = {
-            "converted_code": result.code,
-            "success": result.success,
-            "confidence": result.confidence,
-            "strategy_used": result.strategy_used.value,
-            "components": format_components(result.components),
-            "metadata": {
-                **result.metadata,
-                "duration_seconds": time.time() - start,
-                "agent_capabilities": pipeline.get_agent_status()
-            }
-        }
-
-        return ConversionResponse(**response_data)
-
-    except Exception as e:
-        logger.error(f"Agentic conversion failed: {str(e)}", exc_info=True)
-        raise HTTPException(status_code=500, detail=str(e))
-
-# New endpoint for agent status
-@app.get("/agent/status")
-async def get_agent_status(pipeline = Depends(get_pipeline)):
-    return pipeline.get_agent_status()
-
-# New endpoint for providing feedback
-@app.post("/agent/feedback")
-async def provide_feedback(
-    feedback: Dict[str, Any], 
-    pipeline = Depends(get_pipeline)
-):
-    input_hash = feedback.get("input_hash")
-    score = feedback.get("score")  # 1-5 scale
-    
-    if hasattr(pipeline, 'provide_feedback'):
-        pipeline.provide_feedback(input_hash, score)
-        return {"status": "feedback_received"}
-    
-    return {"status": "feedback_not_supported"}   
\ No newline at end of file
@@ -2,28 +2,165 @@
 # Parses Cypress test files and returns AST + metadata using Babel via subprocess (Node.js required)
 
 import os
+import atexit
+import hashlib
+import queue
+import sqlite3
 import subprocess
-import json
+import threading
+import orjson
+from concurrent.futures import ThreadPoolExecutor
+
+PARSE_SCRIPT = "js/parseAst.js"
+PARSE_SERVER_SCRIPT = "js/parseAstServer.js"
+# Parser output by file content, kept across runs next to this module
+AST_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ast_cache.db")
+PARSE_WORKERS = min(4, os.cpu_count() or 1)  # Node processes parsing in parallel
+
+_ast_cache = None
+_ast_parsers = None
+
+class AstCache:
+    """SQLite map from file digest to the parser's JSON output"""
+
+    def __init__(self, db_path=AST_CACHE_PATH):
+        # One connection shared by the parse workers, serialised by the lock
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS asts (key BLOB PRIMARY KEY, output TEXT NOT NULL)"
+            )
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT output FROM asts WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def put(self, key, output):
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO asts (key, output) VALUES (?, ?)", (key, output))
+
+class AstParserProcess:
+    """One long-lived Node parser: a file path in, one line of JSON out"""
+    TIMEOUT = 30  # seconds to wait for a single file
+
+    def __init__(self, script=PARSE_SERVER_SCRIPT):
+        self.script = script
+        self._proc = None
+        self._lines = None
+
+    def _start(self):
+        self._proc = subprocess.Popen(
+            ["node", self.script],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            text=True, encoding="utf-8", bufsize=1
+        )
+        # Read on a thread so a hung parse can time out instead of blocking
+        self._lines = queue.Queue()
+        threading.Thread(target=self._read, args=(self._proc, self._lines), daemon=True).start()
+
+    @staticmethod
+    def _read(proc, lines):
+        for line in proc.stdout:
+            lines.put(line)
+        lines.put(None)  # The process exited
+
+    def parse(self, file_path):
+        """Return the raw JSON line for one file, (re)starting Node if needed"""
+        if self._proc is None or self._proc.poll() is not None:
+            self._start()
+        self._proc.stdin.write(file_path + "\n")
+        self._proc.stdin.flush()
+        try:
+            line = self._lines.get(timeout=self.TIMEOUT)
+        except queue.Empty:
+            self.close()
+            raise TimeoutError(f"AST parser took longer than {self.TIMEOUT}s")
+        if line is None:
+            self.close()
+            raise RuntimeError("AST parser process exited")
+        return line.rstrip("\n")
+
+    def close(self):
+        proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        if proc.poll() is None:
+            proc.stdin.close()
+            try:
+                proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+def _get_ast_cache():
+    global _ast_cache
+    if _ast_cache is None:
+        _ast_cache = AstCache()
+    return _ast_cache
+
+def _get_ast_parsers():
+    """Pool of Node parsers; each worker thread checks one out per file"""
+    global _ast_parsers
+    if _ast_parsers is None:
+        _ast_parsers = queue.Queue()
+        for _ in range(PARSE_WORKERS):
+            parser = AstParserProcess()
+            atexit.register(parser.close)
+            _ast_parsers.put(parser)
+    return _ast_parsers
+
+def _script_digest():
+    """Hash of the parser scripts, so cached output is dropped when they change"""
+    digest = hashlib.blake2b(digest_size=16)
+    for script in (PARSE_SCRIPT, PARSE_SERVER_SCRIPT):
+        with open(script, "rb") as f:
+            digest.update(f.read())
+    return digest.digest()
+
+def _parse_file(directory_path, file, cache, script_digest):
+    file_path = os.path.join(directory_path, file)
+    try:
+        with open(file_path, "rb") as f:
+            key = hashlib.blake2b(f.read(), digest_size=16, key=script_digest).digest()
+        ast_output = cache.get(key)
+        fresh = ast_output is None
+        if fresh:
+            parsers = _get_ast_parsers()
+            parser = parsers.get()
+            try:
+                ast_output = parser.parse(file_path)
+            finally:
+                parsers.put(parser)
+        ast_data = orjson.loads(ast_output)
+        if "error" in ast_data:
+            raise RuntimeError(ast_data["error"])
+        if fresh:
+            # Only output that parsed cleanly is worth keeping
+            cache.put(key, ast_output)
+        return {
+            "filename": file,
+            "filepath": file_path,
+            "ast": ast_data.get("ast"),
+            "customCommands": ast_data.get("customCommands", [])
+        }
+    except Exception as e:
+        print(f"❌ Error parsing {file}: {str(e)}")
+        return None
 
 def parse_cypress_directory(directory_path):
     """
     Invokes a Node.js script to parse Cypress test files into ASTs and extract metadata.
+    Files whose content was parsed before are served from the AST cache; the
+    rest are spread over PARSE_WORKERS Node processes.
     """
-    results = []
-    for file in os.listdir(directory_path):
-        if file.endswith(".js") or file.endswith(".ts"):
-            file_path = os.path.join(directory_path, file)
-            try:
-                ast_output = subprocess.check_output([
-                    "node", "js/parseAst.js", file_path
-                ])
-                ast_data = json.loads(ast_output)
-                results.append({
-                    "filename": file,
-                    "filepath": file_path,
-                    "ast": ast_data.get("ast"),
-                    "customCommands": ast_data.get("customCommands", [])
-                })
-            except Exception as e:
-                print(f"❌ Error parsing {file}: {str(e)}")
-    return results
+    files = [file for file in os.listdir(directory_path)
+             if file.endswith(".js") or file.endswith(".ts")]
+    if not files:
+        return []
+    cache = _get_ast_cache()
+    script_digest = _script_digest()
+    with ThreadPoolExecutor(max_workers=min(PARSE_WORKERS, len(files))) as executor:
+        entries = executor.map(lambda file: _parse_file(directory_path, file, cache, script_digest), files)
+        return [entry for entry in entries if entry is not None]
@@ -1,27 +1,253 @@
 from __future__ import annotations
 
 import hashlib
-import uuid
-from typing import Any, Dict, List, Sequence, Optional
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Sequence, Optional, Tuple
 
-import chromadb
+import numpy as np
 from sentence_transformers import SentenceTransformer
 
+_METADATA_FIELDS = ("component_type", "input_props", "source")
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_QUOTES = str.maketrans('"', "'")
+
+def _canon(text: str) -> str:
+    """Whitespace- and quote-style-insensitive form of a snippet for embedding"""
+    return _WHITESPACE_RE.sub(" ", text).strip().translate(_QUOTES)
+
+_SQL_CREATE_ENTRIES = """
+    CREATE TABLE IF NOT EXISTS entries (
+        collection TEXT NOT NULL,
+        id TEXT NOT NULL,
+        document TEXT NOT NULL,
+        component_type TEXT NOT NULL,
+        input_props TEXT NOT NULL,
+        source TEXT NOT NULL,
+        embedding BLOB NOT NULL,
+        PRIMARY KEY (collection, id)
+    )
+"""
+
+# Embeddings by (model, max_seq_length, text) digest, so repeats skip the model;
+# stored as float16, half the bytes, with no visible effect on cosine scores
+_SQL_CREATE_EMBEDDINGS = """
+    CREATE TABLE IF NOT EXISTS embeddings (
+        key BLOB PRIMARY KEY,
+        vec BLOB NOT NULL
+    )
+"""
+
+_SQL_GET_EMBEDDING = "SELECT vec FROM embeddings WHERE key = ?"
+
+_SQL_PUT_EMBEDDING = "INSERT OR REPLACE INTO embeddings (key, vec) VALUES (?, ?)"
+
+_SQL_LOAD_ENTRIES = """
+    SELECT id, document, component_type, input_props, source, embedding
+    FROM entries WHERE collection = ?
+"""
+
+_SQL_PUT_ENTRY = """
+    INSERT OR REPLACE INTO entries
+        (collection, id, document, component_type, input_props, source, embedding)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+# One row per legacy store already copied in, so each is imported only once
+_SQL_CREATE_IMPORTS = """
+    CREATE TABLE IF NOT EXISTS imports (
+        source TEXT PRIMARY KEY
+    )
+"""
+
+_SQL_GET_IMPORT = "SELECT 1 FROM imports WHERE source = ?"
+
+_SQL_PUT_IMPORT = "INSERT OR IGNORE INTO imports (source) VALUES (?)"
+
 class RAGKnowledgeBase:
     EMB_MODEL = "all-MiniLM-L6-v2"
     DEFAULT_COLLECTION = "transform_cache"
+    DB_PATH = os.path.join(_BACKEND_DIR, "kb.sqlite3")
+    CHROMA_PATH = os.path.join(_BACKEND_DIR, "chroma_db")  # The store this one replaced
+    MAX_SEQ_LENGTH = 128
+    QUANTIZE_ON_CPU = True
+    EMB_CACHE_SIZE = 4096  # Embeddings kept in memory; the rest are in SQLite
+
+    def __init__(self, collection_name: str | None = None, db_path: str | None = None) -> None:
+        self.collection_name = collection_name or self.DEFAULT_COLLECTION
+        self.conn = sqlite3.connect(db_path or self.DB_PATH, check_same_thread=False)
+        self._db_lock = threading.Lock()
+        # Writes are committed on one background thread, in submission order,
+        # so callers don't wait on disk; in-memory state is updated immediately
+        self._io = ThreadPoolExecutor(max_workers=1, thread_name_prefix="kb-writer")
+        self._pending: List[Any] = []
+        with self.conn:
+            self.conn.execute(_SQL_CREATE_ENTRIES)
+            self.conn.execute(_SQL_CREATE_EMBEDDINGS)
+            self.conn.execute(_SQL_CREATE_IMPORTS)
+        self.model = self._load_model()
 
-    def __init__(self, collection_name: str | None = None) -> None:
-        self.client = chromadb.PersistentClient(path="./chroma_db")
-        self.collection = self.client.get_or_create_collection(
-            name=collection_name or self.DEFAULT_COLLECTION
-        )
-        self.model = SentenceTransformer(self.EMB_MODEL)
-        print(f"RAG Knowledge Base initialized with collection: {self.collection.name}")
-        print(f"Current cache entries: {self.collection.count()}")
+        # Unit-length embeddings in one matrix, rows aligned with the lists below;
+        # a brute-force dot product is exact and sub-millisecond at this size
+        self._ids: List[str] = []
+        self._documents: List[str] = []
+        self._metadatas: List[Dict[str, str]] = []
+        self._rows: Dict[str, int] = {}
+        self._vectors = np.zeros((0, self.model.get_sentence_embedding_dimension()), dtype=np.float32)
+        self._count = 0
+        self._emb_cache: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._emb_salt = f"{self.EMB_MODEL}|{self.MAX_SEQ_LENGTH}|f16|".encode()
+        self._import_chroma()
+        self._load()
 
-    def _embed(self, text: str) -> List[float]:
-        return self.model.encode(text).tolist()
+        print(f"RAG Knowledge Base initialized with collection: {self.collection_name}")
+        print(f"Current cache entries: {self.count()}")
+
+    def _load_model(self) -> SentenceTransformer:
+        """GPU with fp16 when CUDA is available, int8-quantized on CPU otherwise"""
+        try:
+            import torch
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+        except ImportError:
+            torch = None
+            device = "cpu"
+        model = SentenceTransformer(self.EMB_MODEL, device=device)
+        if device == "cuda":
+            model = model.half()
+        elif self.QUANTIZE_ON_CPU and torch is not None:
+            # int8 Linear layers, as ConversionCache does for its embedder
+            try:
+                model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+            except Exception as e:
+                print(f"Embedding model left unquantized: {str(e)}")
+        # Code snippets are short; attention cost grows with the square of this
+        model.max_seq_length = self.MAX_SEQ_LENGTH
+        return model
+
+    def count(self) -> int:
+        return self._count
+
+    def flush(self) -> None:
+        """Wait until every queued write has been committed"""
+        pending, self._pending = self._pending, []
+        wait(pending)
+
+    def _write(self, sql: str, rows: List[tuple]) -> None:
+        try:
+            with self._db_lock, self.conn:
+                self.conn.executemany(sql, rows)
+        except Exception as e:
+            print(f"Error adding to cache: {str(e)}")
+
+    def _submit_write(self, sql: str, rows: List[tuple]) -> None:
+        self._pending = [future for future in self._pending if not future.done()]
+        self._pending.append(self._io.submit(self._write, sql, rows))
+
+    def _load(self) -> None:
+        rows = self.conn.execute(_SQL_LOAD_ENTRIES, (self.collection_name,)).fetchall()
+        if not rows:
+            return
+        self._vectors = np.stack([np.frombuffer(row[5], dtype=np.float32) for row in rows])
+        for index, (entry_id, document, *metadata, _) in enumerate(rows):
+            self._ids.append(entry_id)
+            self._documents.append(document)
+            self._metadatas.append(dict(zip(_METADATA_FIELDS, metadata)))
+            self._rows[entry_id] = index
+        self._count = len(rows)
+
+    def _import_chroma(self) -> None:
+        """Copy every collection of the old Chroma store into SQLite, once"""
+        if not os.path.isdir(self.CHROMA_PATH):
+            return
+        if self.conn.execute(_SQL_GET_IMPORT, ("chroma",)).fetchone():
+            return
+        try:
+            import chromadb
+        except ImportError:
+            print(f"chromadb is not installed; entries in {self.CHROMA_PATH} were not imported")
+            return
+
+        rows = []
+        try:
+            client = chromadb.PersistentClient(path=self.CHROMA_PATH)
+            for listed in client.list_collections():
+                # Names in chromadb 0.6, collection objects before that
+                name = listed if isinstance(listed, str) else listed.name
+                stored = client.get_collection(name).get(include=["documents", "metadatas"])
+                for entry_id, document, metadata in zip(stored["ids"], stored["documents"], stored["metadatas"]):
+                    if document is None:
+                        continue
+                    metadata = metadata or {}
+                    rows.append((
+                        name, entry_id, document,
+                        metadata.get("component_type") or "GenericComponent",
+                        # Older entries kept the props under their DriveWorks name
+                        metadata.get("input_props", metadata.get("driveworks_props", "")),
+                        metadata.get("source", "auto_learned"),
+                    ))
+            # Re-embedded rather than copied: Chroma held unnormalized vectors
+            embeddings = self._embed_many([row[2] for row in rows]) if rows else []
+        except Exception as e:
+            print(f"Error importing {self.CHROMA_PATH}: {str(e)}")
+            return
+
+        with self._db_lock, self.conn:
+            self.conn.executemany(_SQL_PUT_ENTRY, [
+                (*row, embedding.tobytes()) for row, embedding in zip(rows, embeddings)
+            ])
+            self.conn.execute(_SQL_PUT_IMPORT, ("chroma",))
+        print(f"Imported {len(rows)} entries from {self.CHROMA_PATH}")
+
+    def _embed(self, text: str) -> np.ndarray:
+        return self._embed_many([text])[0]
+
+    def _embed_many(self, texts: Sequence[str]) -> np.ndarray:
+        """Unit-length float32 embeddings; only texts never seen before are encoded"""
+        # Snippets differing only in layout or quote style share one embedding
+        texts = [_canon(text) for text in texts]
+        keys = [hashlib.blake2b(self._emb_salt + text.encode(), digest_size=16).digest() for text in texts]
+        vectors: List[np.ndarray | None] = [None] * len(texts)
+        misses: Dict[bytes, List[int]] = {}
+        for index, key in enumerate(keys):
+            vector = self._emb_cache.get(key)
+            if vector is None:
+                with self._db_lock:
+                    row = self.conn.execute(_SQL_GET_EMBEDDING, (key,)).fetchone()
+                if row is not None:
+                    vector = np.frombuffer(row[0], dtype=np.float16).astype(np.float32)
+                    self._remember_embedding(key, vector)
+            else:
+                self._emb_cache.move_to_end(key)
+            if vector is None:
+                misses.setdefault(key, []).append(index)
+            else:
+                vectors[index] = vector
+
+        if misses:
+            encoded = self.model.encode(
+                [texts[indexes[0]] for indexes in misses.values()], batch_size=64,
+                normalize_embeddings=True, convert_to_numpy=True, show_progress_bar=False
+            ).astype(np.float32)
+            self._submit_write(_SQL_PUT_EMBEDDING, [
+                (key, vector.astype(np.float16).tobytes()) for key, vector in zip(misses, encoded)
+            ])
+            for (key, indexes), vector in zip(misses.items(), encoded):
+                self._remember_embedding(key, vector)
+                for index in indexes:
+                    vectors[index] = vector
+        return np.stack(vectors)
+
+    def _remember_embedding(self, key: bytes, vector: np.ndarray) -> None:
+        self._emb_cache[key] = vector
+        if len(self._emb_cache) > self.EMB_CACHE_SIZE:
+            self._emb_cache.popitem(last=False)
 
     def add_conversion(
         self,
@@ -30,30 +256,54 @@ class RAGKnowledgeBase:
         output_code: str,
         source: str = "auto_learned",
     ) -> None:
-        if not component_type:
-            component_type = "GenericComponent"
-        unique_id = hashlib.md5(f"{component_type}:{input_props}".encode()).hexdigest()
+        self.add_conversions_bulk([(component_type, input_props, output_code)], source=source)
 
-        try:
-            self.collection.delete(ids=[unique_id])
-        except:
-            pass
+    def add_conversions_bulk(
+        self,
+        batch: Sequence[Tuple[str, str, str]],
+        source: str = "auto_learned",
+    ) -> None:
+        """Add (component_type, input_props, output_code) tuples with one encode call"""
+        if not batch:
+            return
+        entries = [(component_type or "GenericComponent", input_props, output_code)
+                   for component_type, input_props, output_code in batch]
+        ids = [hashlib.md5(f"{component_type}:{input_props}".encode()).hexdigest()
+               for component_type, input_props, _ in entries]
 
         try:
-            self.collection.add(
-                embeddings=[self._embed(output_code)],
-                documents=[output_code],
-                metadatas=[
-                    {
-                        "component_type": component_type,
-                        "input_props": input_props,
-                        "source": source,
-                    }
-                ],
-                ids=[unique_id],
-            )
+            embeddings = self._embed_many([output_code for _, _, output_code in entries])
         except Exception as e:
             print(f"Error adding to cache: {str(e)}")
+            return
+        self._submit_write(_SQL_PUT_ENTRY, [
+            (self.collection_name, unique_id, output_code,
+             component_type, input_props, source, embedding.tobytes())
+            for unique_id, (component_type, input_props, output_code), embedding
+            in zip(ids, entries, embeddings)
+        ])
+
+        new_rows = sum(1 for unique_id in set(ids) if unique_id not in self._rows)
+        needed = self._count + new_rows
+        if needed > len(self._vectors):
+            grown = np.zeros((max(64, needed, self._count * 2), self._vectors.shape[1]), dtype=np.float32)
+            grown[:self._count] = self._vectors[:self._count]
+            self._vectors = grown
+
+        for unique_id, (component_type, input_props, output_code), embedding in zip(ids, entries, embeddings):
+            metadata = {"component_type": component_type, "input_props": input_props, "source": source}
+            row = self._rows.get(unique_id)
+            if row is None:
+                row = self._count
+                self._ids.append(unique_id)
+                self._documents.append(output_code)
+                self._metadatas.append(metadata)
+                self._rows[unique_id] = row
+                self._count += 1
+            else:
+                self._documents[row] = output_code
+                self._metadatas[row] = metadata
+            self._vectors[row] = embedding
 
     def query(
         self,
@@ -63,41 +313,66 @@ class RAGKnowledgeBase:
         filters: Dict[str, Any] | None = None,
     ) -> List[Dict[str, Any]]:
         try:
-            where_filter = filters if filters else None
-            res = self.collection.query(
-                query_embeddings=[self._embed(query_text)],
-                n_results=n_results,
-                where=where_filter,
-            )
-            docs: Sequence[str] = res.get("documents", [[]])[0]
-            results = []
-
-            if docs:
-                for i in range(len(docs)):
-                    result = {
-                        "text": docs[i],
-                        "metadata": res["metadatas"][0][i] if "metadatas" in res and len(res["metadatas"]) > 0 else {},
-                        "id": res["ids"][0][i] if "ids" in res and len(res["ids"]) > 0 else "",
-                        "distance": res["distances"][0][i] if "distances" in res and len(res["distances"]) > 0 else None,
-                    }
-                    results.append(result)
-            return results
+            if not self._count:
+                return []
+            return self._query_similarities(self._similarities(query_text), n_results, filters)
         except Exception as e:
             print(f"Error querying knowledge base: {str(e)}")
             return []
 
-    def best_match(self, component_type: str, props_str: str, *, threshold: float = 1.5) -> Dict[str, Any] | None:
+    def _similarities(self, query_text: str) -> np.ndarray:
+        return self._vectors[:self._count] @ self._embed(query_text)
+
+    def _query_similarities(
+        self,
+        sims: np.ndarray,
+        n_results: int,
+        filters: Dict[str, Any] | None,
+    ) -> List[Dict[str, Any]]:
+        if filters:
+            mask = np.fromiter(
+                (all(meta.get(k) == v for k, v in filters.items()) for meta in self._metadatas),
+                dtype=bool, count=self._count
+            )
+            sims = np.where(mask, sims, -np.inf)
+
+        k = min(n_results, self._count)
+        top = np.argpartition(-sims, k - 1)[:k] if k < self._count else np.arange(self._count)
+        top = top[np.argsort(-sims[top])]
+
+        results = []
+        for i in top.tolist():
+            if sims[i] == -np.inf:
+                break
+            results.append({
+                "text": self._documents[i],
+                "metadata": self._metadatas[i],
+                "id": self._ids[i],
+                # Cosine distance: 0 for identical direction, up to 2 for opposite
+                "distance": float(1.0 - sims[i]),
+            })
+        return results
+
+    # Cosine distance; the same cut-off as Chroma's 1.5 on its squared-L2 scale
+    def best_match(self, component_type: str, props_str: str, *, threshold: float = 0.75) -> Dict[str, Any] | None:
         if not component_type:
             component_type = "GenericComponent"
 
         query = f"Code snippet for {component_type} with {props_str}"
-        hits = self.query(query, n_results=1, filters={"component_type": component_type})
-
-        if hits and hits[0]["distance"] < threshold:
-            return hits[0]
+        try:
+            if not self._count:
+                return None
+            # One embedding and one similarity pass serve both the filtered and
+            # the unfiltered lookup
+            sims = self._similarities(query)
+            hits = self._query_similarities(sims, 1, {"component_type": component_type})
+            if hits and hits[0]["distance"] < threshold:
+                return hits[0]
 
-        hits = self.query(query, n_results=1)
-        if hits and hits[0]["distance"] < threshold:
-            return hits[0]
+            hits = self._query_similarities(sims, 1, None)
+            if hits and hits[0]["distance"] < threshold:
+                return hits[0]
+        except Exception as e:
+            print(f"Error querying knowledge base: {str(e)}")
 
         return None
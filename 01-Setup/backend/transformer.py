@@ -3,17 +3,43 @@
 
 import os
 import yaml
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from dspy.dspy_implementation import CypressToPlaywrightAgent
 
+try:
+    from yaml import CSafeLoader as _YamlLoader  # libyaml, much faster when available
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+MAX_TRANSFORM_WORKERS = 8  # Concurrent agent.run calls
+SNIPPET_PLACEHOLDER = "{{CODE_SNIPPET}}"
+
+
+def _template_files(config_dir):
+    return [
+        entry for entry in os.scandir(config_dir)
+        if entry.name.endswith(".yml") or entry.name.endswith(".yaml")
+    ]
+
+
+def _load_yaml(path):
+    with open(path, 'r') as f:
+        return yaml.load(f, Loader=_YamlLoader)
+
+
+@lru_cache(maxsize=8)
+def _load_prompt_templates(config_dir, mtime_key):
+    # A handful of small files; parsing is CPU-bound, so threads would not help
+    return {entry.name: _load_yaml(entry.path) for entry in _template_files(config_dir)}
+
 
 def load_prompt_templates(config_dir):
-    prompts = {}
-    for file in os.listdir(config_dir):
-        if file.endswith(".yml") or file.endswith(".yaml"):
-            with open(os.path.join(config_dir, file), 'r') as f:
-                content = yaml.safe_load(f)
-                prompts[file] = content
-    return prompts
+    # Re-parse only when a template file is added, removed or edited
+    mtime_key = tuple(sorted(
+        (entry.name, entry.stat().st_mtime_ns) for entry in _template_files(config_dir)
+    ))
+    return _load_prompt_templates(config_dir, mtime_key)
 
 
 def extract_code_chunks(parsed_files):
@@ -31,23 +57,34 @@ def extract_code_chunks(parsed_files):
     ]
 
 
+def _transform_chunk(agent, chunk, template_parts):
+    # Same result as template.replace(SNIPPET_PLACEHOLDER, snippet)
+    formatted_prompt = chunk['code_snippet'].join(template_parts)
+
+    try:
+        response = agent.run(prompt=formatted_prompt)
+        chunk['playwright_code'] = response
+    except Exception as e:
+        chunk['playwright_code'] = f"// Error: {e}"
+    return chunk
+
+
 def transform_chunks(parsed_files, config_dir):
     agent = CypressToPlaywrightAgent()
     prompts = load_prompt_templates(config_dir)
     chunks = extract_code_chunks(parsed_files)
+    if not chunks:
+        return []
 
-    results = []
-    for chunk in chunks:
-        prompt_config = prompts.get("command_translation.yaml")
-        formatted_prompt = prompt_config['template'].replace("{{CODE_SNIPPET}}", chunk['code_snippet'])
+    # Split once on the placeholder rather than re-scanning the template per chunk
+    template_parts = prompts.get("command_translation.yaml")['template'].split(SNIPPET_PLACEHOLDER)
 
+    # Logged here, in chunk order, rather than interleaved from the workers
+    for chunk in chunks:
         print(f"🎯 Transforming: {chunk['filename']}, chunk {chunk['chunk_id']}")
-        try:
-            response = agent.run(prompt=formatted_prompt)
-            chunk['playwright_code'] = response
-        except Exception as e:
-            chunk['playwright_code'] = f"// Error: {e}"
-
-        results.append(chunk)
 
-    return results
+    # Each chunk is an independent LLM round trip, so keep several in flight;
+    # results come back in chunk order. The workers share one agent: its
+    # ConversionCache and Groq client are both guarded by locks
+    with ThreadPoolExecutor(max_workers=min(MAX_TRANSFORM_WORKERS, len(chunks))) as executor:
+        return list(executor.map(lambda chunk: _transform_chunk(agent, chunk, template_parts), chunks))
@@ -3,8 +3,11 @@
 
 import os
 import dotenv
+from functools import lru_cache
 
+@lru_cache(maxsize=1)
 def load_env():
+    """Read .env once per process; load_env.cache_clear() forces a re-read"""
     dotenv.load_dotenv()
     return {
         "LLM_PROVIDER": os.getenv("LLM_PROVIDER"),
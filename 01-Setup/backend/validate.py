@@ -5,28 +5,58 @@ import subprocess
 import csv
 import os
 
+_INSTALL_CMD = ["npx", "playwright", "install"]
+_browsers_ready = False
+_browser_install = None  # Popen of an install still running
+
+def start_browser_install(test_dir):
+    """Start `playwright install` in the background, once per process.
+
+    The installer itself checks the browser revisions this Playwright version
+    needs and returns quickly when they are present. Call this before
+    converting so any download overlaps the conversion; run_playwright_tests
+    waits for it.
+    """
+    global _browser_install
+    if _browsers_ready or _browser_install is not None:
+        return
+    _browser_install = subprocess.Popen(_INSTALL_CMD, cwd=test_dir)
+
+
+def ensure_browsers(test_dir):
+    """Block until browsers are installed, starting the install if needed"""
+    global _browsers_ready, _browser_install
+    start_browser_install(test_dir)
+    if _browser_install is not None:
+        install, _browser_install = _browser_install, None
+        if install.wait() != 0:
+            raise subprocess.CalledProcessError(install.returncode, _INSTALL_CMD)
+        _browsers_ready = True
+
+
 def run_playwright_tests(test_dir):
     print("🧪 Running Playwright tests...")
     try:
-        subprocess.run(["npx", "playwright", "install"], cwd=test_dir, check=True)
-        subprocess.run(["npx", "playwright", "test"], cwd=test_dir, check=True)
+        ensure_browsers(test_dir)
+        subprocess.run(["npx", "playwright", "test", "--reporter=line"], cwd=test_dir, check=True)
         print("✅ Playwright tests executed.")
     except subprocess.CalledProcessError as e:
         print(f"❌ Test execution failed: {e}")
 
 
+METRICS_FIELDNAMES = ("filename", "chunk_id", "status")
+METRICS_BUFFER_SIZE = 1 << 20
+
 def log_metrics(chunks, metrics_file):
-    fieldnames = ["filename", "chunk_id", "status"]
     file_exists = os.path.exists(metrics_file)
 
-    with open(metrics_file, 'a', newline='') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+    # Rows go out through one large buffer instead of a write per DictWriter row
+    with open(metrics_file, 'a', newline='', buffering=METRICS_BUFFER_SIZE) as csvfile:
+        writer = csv.writer(csvfile)
         if not file_exists:
-            writer.writeheader()
-
-        for chunk in chunks:
-            writer.writerow({
-                "filename": chunk["filename"],
-                "chunk_id": chunk["chunk_id"],
-                "status": "success" if "playwright_code" in chunk else "fail"
-            })
+            writer.writerow(METRICS_FIELDNAMES)
+
+        writer.writerows(
+            (chunk["filename"], chunk["chunk_id"], "success" if "playwright_code" in chunk else "fail")
+            for chunk in chunks
+        )